@@ -0,0 +1,278 @@
+"""
+This is a file that contains the statistics of archives of game records.
+
+The records are streamed from the files (see read_games) in chunks, every
+chunk is replayed and summarized by a pool of processes, and the summaries of
+the chunks are merged. Only a bounded number of chunks is read ahead of the
+pool, and a summary keeps counters rather than the games, so the memory used
+does not grow with the size of the archive.
+"""
+
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+
+import click
+
+from game_record import read_games
+
+# Number of openings a summary keeps the counters of (see Summary)
+MAX_OPENINGS = 1000
+
+
+class GameFeatures:
+    """
+    This class stores the features of a single game, found by replaying it.
+
+    Public attributes:
+    - size: (int, int) rows_with_pieces and width of the board.
+    - opening: the first moves of the game in PDN, separated by spaces.
+    - winner: the seat of the player who has won, None for a draw.
+    - reason: why the game has ended (see PlayOutResult).
+    - plies: number of moves of the game.
+    - captures: number of pieces captured in the game.
+    - capture_moves: number of moves that captured a piece.
+    - first_king: number of the move that has made the first king, None if none.
+    """
+    __slots__ = ("size", "opening", "winner", "reason", "plies", "captures",
+                 "capture_moves", "first_king")
+
+    def __init__(self, size, opening, winner, reason, plies, captures, capture_moves,
+                 first_king):
+        self.size = size
+        self.opening = opening
+        self.winner = winner
+        self.reason = reason
+        self.plies = plies
+        self.captures = captures
+        self.capture_moves = capture_moves
+        self.first_king = first_king
+
+
+def get_game_features(record, opening_plies=2):
+    """
+    Replays a recorded game through Game.make_move and finds its features
+
+    Input:
+        record (GameRecord) - the record of the game
+        opening_plies (int) - number of moves the opening is made of
+    Output:
+        GameFeatures - the features of the game
+    :raises: ValueError if a move of the record is not legal
+    """
+    opening = " ".join(record.get_move_text(number)
+                       for number in range(min(opening_plies, len(record.moves))))
+    captures = 0
+    capture_moves = 0
+    first_king = None
+    for plies, (_, move_record) in enumerate(record.replay(), start=1):
+        if move_record.captured:
+            captures += len(move_record.captured)
+            capture_moves += 1
+        if first_king is None and move_record.piece.is_king and not move_record.was_king:
+            first_king = plies
+    return GameFeatures((record.rows_with_pieces, record.width), opening, record.winner,
+                        record.reason, len(record.moves), captures, capture_moves, first_king)
+
+
+class Summary:
+    """
+    This class stores the statistics of a set of games as counters, so that
+    its size does not depend on the number of games. Summaries of separate
+    sets of games are combined with merge.
+
+    Public attributes:
+    - games: number of games.
+    - wins: [int, int] number of games won by the player of either seat.
+    - draws: dict of the number of draws by their reason.
+    - plies: total number of moves.
+    - max_plies: number of moves of the longest game.
+    - captures: total number of captured pieces.
+    - capture_moves: total number of moves that captured a piece.
+    - king_games: number of games in which a king has been made.
+    - first_king_plies: total number of moves before the first king, over
+                        the games in which a king has been made.
+    - openings: dict of [games, wins of the first seat, wins of the second
+                seat, draws] by (size of the board, opening).
+    - max_openings: number of openings kept. Once there are twice as many,
+                    only the most frequent ones are kept, so the counters of
+                    rare openings are not exact.
+    """
+
+    def __init__(self, max_openings=MAX_OPENINGS):
+        self.games = 0
+        self.wins = [0, 0]
+        self.draws = {}
+        self.plies = 0
+        self.max_plies = 0
+        self.captures = 0
+        self.capture_moves = 0
+        self.king_games = 0
+        self.first_king_plies = 0
+        self.openings = {}
+        self.max_openings = max_openings
+
+    def add(self, features):
+        """
+        Adds the features of a game to the summary
+        """
+        self.games += 1
+        opening = self.openings.setdefault((features.size, features.opening), [0, 0, 0, 0])
+        opening[0] += 1
+        if features.winner is None:
+            self.draws[features.reason] = self.draws.get(features.reason, 0) + 1
+            opening[3] += 1
+        else:
+            self.wins[features.winner] += 1
+            opening[1 + features.winner] += 1
+        if len(self.openings) > 2 * self.max_openings:
+            self._prune_openings()
+        self.plies += features.plies
+        self.max_plies = max(self.max_plies, features.plies)
+        self.captures += features.captures
+        self.capture_moves += features.capture_moves
+        if features.first_king is not None:
+            self.king_games += 1
+            self.first_king_plies += features.first_king
+
+    def merge(self, other):
+        """
+        Adds the counters of another summary to this one
+        """
+        self.games += other.games
+        self.wins = [wins + other_wins for wins, other_wins in zip(self.wins, other.wins)]
+        for reason, count in other.draws.items():
+            self.draws[reason] = self.draws.get(reason, 0) + count
+        self.plies += other.plies
+        self.max_plies = max(self.max_plies, other.max_plies)
+        self.captures += other.captures
+        self.capture_moves += other.capture_moves
+        self.king_games += other.king_games
+        self.first_king_plies += other.first_king_plies
+        for key, counts in other.openings.items():
+            opening = self.openings.setdefault(key, [0, 0, 0, 0])
+            for i, count in enumerate(counts):
+                opening[i] += count
+        if len(self.openings) > 2 * self.max_openings:
+            self._prune_openings()
+
+    def _prune_openings(self):
+        """
+        Keeps the max_openings most frequent openings
+        """
+        openings = sorted(self.openings.items(), key=lambda item: -item[1][0])
+        self.openings = dict(openings[:self.max_openings])
+
+
+def summarize_chunk(task):
+    """
+    Replays a chunk of recorded games and summarizes them
+
+    Input:
+        task (tuple(list[GameRecord], int)) - the records and the number of
+                                              moves an opening is made of
+    Output:
+        Summary - the summary of the games
+    """
+    records, opening_plies = task
+    summary = Summary()
+    for record in records:
+        summary.add(get_game_features(record, opening_plies))
+    return summary
+
+
+def iter_records(paths):
+    """
+    Streams the records of the games of the files one after another
+    """
+    for path in paths:
+        with open(path, "rb") as file:
+            yield from read_games(file)
+
+
+def analyze(records, processes=None, opening_plies=2, chunk_size=256, max_openings=MAX_OPENINGS):
+    """
+    Summarizes the recorded games on a pool of processes. The records are
+    taken from the iterable in chunks as the pool asks for them: at most two
+    chunks per process are waiting or being replayed at a time.
+
+    Input:
+        records (iterable of GameRecord) - the records, e.g. iter_records(paths)
+        processes (int) - number of processes, None for one per core
+        opening_plies (int) - number of moves an opening is made of
+        chunk_size (int) - number of games summarized by a single task
+        max_openings (int) - number of openings the summary keeps (see Summary)
+    Output:
+        Summary - the summary of all the games
+    """
+    summary = Summary(max_openings)
+    records = iter(records)
+    max_pending = 2 * (processes or cpu_count())
+    pending = deque()
+    with Pool(processes) as pool:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if chunk == []:
+                break
+            if len(pending) >= max_pending:
+                summary.merge(pending.popleft().get())
+            pending.append(pool.apply_async(summarize_chunk, ((chunk, opening_plies),)))
+        while pending:
+            summary.merge(pending.popleft().get())
+    return summary
+
+
+@click.command(name="checkers-analytics")
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--processes', default=None, type=click.IntRange(min=1),
+              help="Number of processes replaying the games (default is one per core)")
+@click.option('--opening-plies', default=2, type=click.IntRange(min=0),
+              help="Number of moves an opening is made of")
+@click.option('--openings', 'top_openings', default=10, type=click.IntRange(min=0),
+              help="Number of the most frequent openings to print")
+def cmd(paths, processes, opening_plies, top_openings):
+    """
+    This is the command line interface for the statistics of game records.
+
+    Input:
+        paths (list[str]) - the files of game records
+        processes (int) - number of processes replaying the games
+        opening_plies (int) - number of moves an opening is made of
+        top_openings (int) - number of the most frequent openings to print
+    """
+    summary = analyze(iter_records(paths), processes, opening_plies,
+                      max_openings=max(MAX_OPENINGS, top_openings))
+    if summary.games == 0:
+        click.echo("no games")
+        return
+
+    games = summary.games
+    click.echo(f"{games} games, average length {summary.plies / games:.1f} moves "
+               f"(longest {summary.max_plies})")
+    click.echo(f"player 1 won {summary.wins[0] / games:.1%}, "
+               f"player 2 won {summary.wins[1] / games:.1%}, "
+               f"draws {sum(summary.draws.values()) / games:.1%}")
+    for reason, count in sorted(summary.draws.items()):
+        click.echo(f"  draws by {reason}: {count}")
+    if summary.plies:
+        click.echo(f"captures: {summary.captures / games:.1f} pieces per game, "
+                   f"{summary.capture_moves / summary.plies:.1%} of the moves")
+    if summary.king_games:
+        click.echo(f"kings made in {summary.king_games / games:.1%} of the games, "
+                   f"the first one after {summary.first_king_plies / summary.king_games:.1f} "
+                   f"moves on average")
+    else:
+        click.echo("no kings made")
+
+    openings = sorted(summary.openings.items(), key=lambda item: -item[1][0])
+    if top_openings and openings:
+        click.echo(f"{'size':>8} {'opening':<24} {'games':>6} {'p1 won':>7} "
+                   f"{'p2 won':>7} {'draws':>6}")
+    for ((rows_with_pieces, width), opening), counts in openings[:top_openings]:
+        total, first, second, draws = counts
+        click.echo(f"{rows_with_pieces:>3}x{width:<4} {opening or '-':<24} {total:>6} "
+                   f"{first / total:>7.1%} {second / total:>7.1%} {draws / total:>6.1%}")
+
+
+if __name__ == "__main__":
+    cmd()
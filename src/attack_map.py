@@ -0,0 +1,112 @@
+"""
+Attack maps: the cells where the pieces of a player could be captured.
+
+The map is built for a position in a single pass over the pieces of the
+opponents, with the masks of the board, so that the safety of any number of
+cells (or moves) can then be looked up in O(1).
+"""
+
+# The diagonal directions a piece can jump in, as (d_row, d_col)
+DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class AttackMap:
+    """
+    This class stores the cells where a piece of a player would be captured
+    by the opponents in the next move.
+
+    The men of the opponents jump forward over a neighbouring cell, their
+    kings slide along the empty cells of a diagonal towards the cell. In both
+    cases the cell behind the captured piece has to be empty.
+
+    Public attributes:
+    - player: the player whose pieces are attacked.
+    - attacked: a bitmask of the cells where a piece of the player could be
+                captured, whether the cell is empty or not.
+    """
+
+    def __init__(self, board, player):
+        """
+        Builds the attack map of the position on the board.
+
+        Input:
+            board: Board - the board of the game. Its players have to be set,
+                   as they decide in which direction the men move.
+
+            player: Player - the player whose pieces are attacked
+        """
+        if board.players is None:
+            raise Exception("The players of the board are not set")
+        self.player = player
+        self._board = board
+        shift = board.shift
+        empty = board.empty_mask()
+        self._empty = empty
+
+        # Cells a jump in every direction could pass over: by any piece, and
+        # by kings only (which reach further once a cell on their way is left)
+        self._hits = {direction: 0 for direction in DIRECTIONS}
+        self._king_hits = {direction: 0 for direction in DIRECTIONS}
+        for seat, enemy in enumerate(board.players):
+            if enemy is player:
+                continue
+            forward = 1 if seat % 2 == 0 else -1
+            men = board.men.get(enemy, 0)
+            kings = board.kings.get(enemy, 0)
+            for d_row, d_col in DIRECTIONS:
+                reach = kings
+                ray = kings
+                while ray:
+                    ray = shift(ray, d_row, d_col) & empty
+                    reach |= ray
+                king_hits = shift(reach, d_row, d_col)
+                self._king_hits[(d_row, d_col)] |= king_hits
+                self._hits[(d_row, d_col)] |= king_hits
+                if d_row == forward:
+                    self._hits[(d_row, d_col)] |= shift(men, d_row, d_col)
+
+        self.attacked = 0
+        for (d_row, d_col), hits in self._hits.items():
+            self.attacked |= hits & shift(empty, -d_row, -d_col)
+
+    def is_attacked(self, position):
+        """
+        Checks if a piece of the player on the cell could be captured
+        """
+        return bool(self.attacked >> self._board.index(position) & 1)
+
+    def is_safe_move(self, initial_pos, final_pos):
+        """
+        Checks if a piece of the player can make a simple move without being
+        captured right away. The cell the piece leaves is taken into account:
+        an opponent may land on it, and kings may slide through it.
+
+        Input:
+            initial_pos: tuple(int, int) - the cell the piece moves from
+
+            final_pos: tuple(int, int) - the cell the piece moves to
+
+        Output:
+            True - if the piece cannot be captured on the final cell
+            False - otherwise
+        """
+        board = self._board
+        origin = 1 << board.index(initial_pos)
+        target = 1 << board.index(final_pos)
+        # Cells the capturing piece may land on
+        free = origin | self._empty
+        for d_row, d_col in DIRECTIONS:
+            if not board.shift(target, d_row, d_col) & free:
+                continue
+            if self._hits[(d_row, d_col)] & target:
+                return False
+            if (self._king_hits[(d_row, d_col)] & origin and
+                    board.shift(origin, d_row, d_col) == target):
+                return False
+        return True
+
+    def get_hanging_pieces(self):
+        """
+        Returns the bitmask of the pieces of the player that could be captured
+        """
+        return self.attacked & self._board.player_mask(self.player)
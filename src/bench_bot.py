@@ -0,0 +1,179 @@
+"""
+This is a file that contains the benchmarks of the decision latency of the bots.
+
+The bots and the helpers of CheckersBot are timed over a corpus of positions
+taken from seeded games, from the opening to the endgame and on boards of
+different sizes. For every function the median and the 99th percentile of
+the time per call are reported, with the peak memory a call allocates.
+"""
+
+from time import perf_counter
+import random
+import tracemalloc
+
+import click
+
+from game import Game
+from bot import CheckersBot, RandomBot
+from perft import load_position, dump_position
+
+# The sizes of the boards, as (rows_with_pieces, width)
+SIZES = ((3, 8), (4, 10), (8, 20))
+
+PHASES = ("opening", "middlegame", "endgame")
+
+# The functions that are timed: the name, whether it is timed on positions
+# with jumps (True), without jumps (False) or on all positions (None), and
+# the call, given the bot, the game and the moves of the player to move
+BENCHMARKS = (
+    ("CheckersBot.choose_move", None,
+     lambda bots, game, moves: bots[0].choose_move(game.board, moves)),
+    ("RandomBot.choose_move", None,
+     lambda bots, game, moves: bots[1].choose_move(game.board, moves)),
+    ("best_jump", True,
+     lambda bots, game, moves: bots[0].best_jump(moves)),
+    ("check_if_danger", False,
+     lambda bots, game, moves: bots[0].check_if_danger(moves, game.board)),
+    ("aggressive_moves", False,
+     lambda bots, game, moves: bots[0].aggressive_moves(moves, game.board)),
+    ("check_if_back_pieces", False,
+     lambda bots, game, moves: bots[0].check_if_back_pieces(moves, game.board.number_of_rows)),
+)
+
+
+def build_corpus(sizes=SIZES, games=4, positions_per_phase=3, seed=0):
+    """
+    Plays seeded games between two CheckersBots and takes positions from the
+    opening, the middlegame and the endgame (the thirds of every game).
+
+    Input:
+        sizes (list[tuple(int, int)]) - sizes of the boards, (rows_with_pieces, width)
+        games (int) - number of games per size
+        positions_per_phase (int) - number of positions taken from every phase of a game
+        seed (int) - the seed of the games
+    Output:
+        list[tuple(tuple(int, int), str, str)] - the size, the phase and the
+        position (see load_position) of every position of the corpus
+    """
+    corpus = []
+    for size in sizes:
+        for number in range(games):
+            random.seed(f"{seed}:{size}:{number}")
+            players = [CheckersBot("Player 1", "white"), CheckersBot("Player 2", "black")]
+            game = Game(players, *size)
+            positions = []
+            for plies in range(400):
+                moves = game.get_possible_moves(players[plies % 2])
+                if moves == []:
+                    break
+                positions.append(dump_position(game))
+                game.make_move(players[plies % 2].choose_move(game.board, moves))
+
+            third = len(positions) / 3
+            for phase_number, phase in enumerate(PHASES):
+                phase_positions = positions[int(phase_number * third):int((phase_number + 1) * third)]
+                for position in random.sample(phase_positions,
+                                              min(positions_per_phase, len(phase_positions))):
+                    corpus.append((size, phase, position))
+    return corpus
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which the given fraction of the sorted values lie
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_benchmarks(corpus, repeat=20):
+    """
+    Times every function of BENCHMARKS on the positions of the corpus.
+    The positions are taken in turns, so that no call is made twice in a row
+    on the same position (the bots keep results of the position they have
+    seen last). The memory is measured in a separate pass, as tracing it
+    slows the calls down.
+
+    Input:
+        corpus (list) - the positions, see build_corpus
+        repeat (int) - number of times every call is timed
+    Output:
+        dict - for every (size, phase, name of the function): the number of
+               calls timed, the median and the 99th percentile of their time
+               in microseconds, and the median peak memory of a call in bytes
+    """
+    bots = [CheckersBot("bench-smart-bot", "white"), RandomBot("bench-random-bot", "white")]
+    positions = []
+    for size, phase, position in corpus:
+        game = load_position(position)
+        moves = game.get_possible_moves(game.players[game.board.side_to_move])
+        if moves != []:
+            positions.append((size, phase, game, moves, game.is_jump(moves[0])))
+
+    times = {}
+    memory = {}
+    for name, jumps, call in BENCHMARKS:
+        selected = [entry for entry in positions if jumps is None or entry[4] == jumps]
+        for _ in range(repeat):
+            for size, phase, game, moves, _ in selected:
+                start = perf_counter()
+                call(bots, game, list(moves))
+                elapsed = perf_counter() - start
+                times.setdefault((size, phase, name), []).append(elapsed * 1e6)
+
+        tracemalloc.start()
+        for size, phase, game, moves, _ in selected:
+            moves = list(moves)
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call(bots, game, moves)
+            memory.setdefault((size, phase, name), []).append(
+                tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+
+    results = {}
+    for key, values in times.items():
+        values.sort()
+        peaks = sorted(memory[key])
+        results[key] = {
+            "calls": len(values),
+            "median_us": percentile(values, 0.5),
+            "p99_us": percentile(values, 0.99),
+            "peak_bytes": percentile(peaks, 0.5),
+        }
+    return results
+
+
+@click.command(name="checkers-bench-bot")
+@click.option('--size', 'sizes', type=(int, int), multiple=True,
+              help="Size of a board as ROWS_WITH_PIECES WIDTH (can be repeated)")
+@click.option('--games', default=4, type=click.IntRange(min=1),
+              help="Number of games the positions are taken from, per size")
+@click.option('--positions-per-phase', default=3, type=click.IntRange(min=1))
+@click.option('--repeat', default=20, type=click.IntRange(min=1),
+              help="Number of times every call is timed")
+@click.option('--seed', default=0)
+def cmd(sizes, games, positions_per_phase, repeat, seed):
+    """
+    This is the command line interface for the benchmarks of the bots.
+
+    Input:
+        sizes (list[tuple(int, int)]) - sizes of the boards (all of SIZES by default)
+        games (int) - number of games per size
+        positions_per_phase (int) - number of positions taken from every phase of a game
+        repeat (int) - number of times every call is timed
+        seed (int) - seed of the games
+    """
+    corpus = build_corpus(sizes or SIZES, games, positions_per_phase, seed)
+    results = run_benchmarks(corpus, repeat)
+
+    click.echo(f"{'size':>8} {'phase':<11} {'function':<24} {'calls':>6} "
+               f"{'median us':>10} {'p99 us':>10} {'peak KiB':>9}")
+    for (size, phase, name), result in sorted(
+            results.items(), key=lambda item: (item[0][0], PHASES.index(item[0][1]), item[0][2])):
+        click.echo(f"{size[0]:>3}x{size[1]:<4} {phase:<11} {name:<24} {result['calls']:>6} "
+                   f"{result['median_us']:>10.1f} {result['p99_us']:>10.1f} "
+                   f"{result['peak_bytes'] / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    cmd()
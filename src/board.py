@@ -1,25 +1,135 @@
 from game_piece import GamePiece
+from zobrist import get_zobrist_table
 
 
 class Board:
     """
     A class that represents the board of the game.
 
+    The position is stored as bitboards: the cell (row, col) corresponds to the
+    bit number row * number_of_cols + col of a Python int, so every set of
+    cells on the board can be kept (and shifted around) as a single int.
+
     Attributes:
     - number_of_rows : The number of rows of the board.
     - number_of_cols : The number of columns of the board.
+    - full_mask : A bitmask that has a bit set for every cell of the board.
+    - men : A dictionary mapping every player to the bitmask of their men.
+    - kings : A dictionary mapping every player to the bitmask of their kings.
+    - occupied : A bitmask of all the cells that contain a game piece.
+    - men_count : A dictionary mapping every player to the number of their men.
+    - king_count : A dictionary mapping every player to the number of their kings.
+    - cells : A flat list with the game pieces, indexed by the bit number
+              of the cell they are placed on (None for empty cells).
     - grid : The grid of the board. It stores the game pieces.
+             It is a read-only view derived from the cells, so the board
+             must only be changed through the methods of this class.
+    - key : The 64-bit Zobrist key of the position, including the side to move.
+    - side_to_move : The number of the player to move (0 or 1), as counted
+                     by switch_side.
+    - players : The players in the order of their seats, which choose the
+                Zobrist keys of their pieces (None until they are set).
     """
-    def __init__(self, number_of_rows, number_of_cols):
+    def __init__(self, number_of_rows, number_of_cols, players=None):
         self.number_of_rows = number_of_rows
         self.number_of_cols = number_of_cols
-        self.grid = []
-        # Populate the board with empty spaces
+        self.full_mask = (1 << (number_of_rows * number_of_cols)) - 1
+        self.men = {}
+        self.kings = {}
+        self.men_count = {}
+        self.king_count = {}
+        self.occupied = 0
+        self.cells = [None] * (number_of_rows * number_of_cols)
+        self._grid = None
+        self.key = 0
+        self.side_to_move = 0
+        self._zobrist = get_zobrist_table(number_of_rows, number_of_cols)
+        # Zobrist keys of the men and of the kings of every player, by seat.
+        # Until the players are set, they get their keys in the order their
+        # first piece is placed.
+        self.players = None
+        self._piece_keys = {}
+        if players is not None:
+            self.set_players(players)
+
+        # Masks of the cells a piece can be shifted from by a column offset
+        # without wrapping around to the neighbouring row
+        first_col = 0
+        last_col = 0
         for i in range(number_of_rows):
-            line = []
-            for j in range(number_of_cols):
-                line.append(None)
-            self.grid.append(line)
+            first_col |= 1 << (i * number_of_cols)
+            last_col |= 1 << (i * number_of_cols + number_of_cols - 1)
+        self._col_masks = {0: self.full_mask,
+                           1: self.full_mask & ~last_col,
+                           -1: self.full_mask & ~first_col}
+
+    @property
+    def grid(self):
+        """
+        A list of rows of the board, where every row is a list of
+        GamePieces (or None for an empty cell).
+        The view is rebuilt lazily after the board has been changed.
+        """
+        if self._grid is None:
+            cols = self.number_of_cols
+            self._grid = [self.cells[i * cols:(i + 1) * cols]
+                          for i in range(self.number_of_rows)]
+        return self._grid
+
+    def index(self, position):
+        """
+        Converts a position (row, col) into the bit number of the cell
+        """
+        return position[0] * self.number_of_cols + position[1]
+
+    def position(self, index):
+        """
+        Converts the bit number of a cell into its position (row, col)
+        """
+        return divmod(index, self.number_of_cols)
+
+    def shift(self, mask, d_row, d_col):
+        """
+        Shifts every cell of the mask by d_row rows and d_col columns.
+        Cells that would leave the board are dropped.
+
+        Input:
+            mask: int - a bitmask of cells
+
+            d_row: int - number of rows to shift by
+
+            d_col: int - number of columns to shift by, one of -1, 0, 1
+
+        Output:
+            int - a bitmask of the shifted cells
+        """
+        mask &= self._col_masks[d_col]
+        offset = d_row * self.number_of_cols + d_col
+        if offset >= 0:
+            return (mask << offset) & self.full_mask
+        return mask >> -offset
+
+    def empty_mask(self):
+        """
+        Returns the bitmask of all the cells that do not contain a piece
+        """
+        return self.full_mask & ~self.occupied
+
+    def player_mask(self, player):
+        """
+        Returns the bitmask of all the cells that contain pieces of the player
+        """
+        return self.men.get(player, 0) | self.kings.get(player, 0)
+
+    def count_pieces(self, player):
+        """
+        Returns the number of the men and of the kings of the player,
+        without looking at the cells of the board
+
+        Output:
+            tuple(int, int) - the number of men and the number of kings
+        """
+        return self.men_count.get(player, 0), self.king_count.get(player, 0)
 
     def move_piece(self, initial_pos: tuple, final_pos: tuple, game):
         """
@@ -31,26 +141,40 @@ class Board:
             final_pos: tuple(int,int) - final position of the piece (row, col)
 
             game: Game - the game object
-        
+
+        Output:
+            list[GamePiece] - the pieces captured by the move
+
         :raises: Exception if the piece cannot be moved
         """
+        initial_index = self.index(initial_pos)
+        final_index = self.index(final_pos)
 
-        if self.grid[initial_pos[0]][initial_pos[1]] is None:
+        if not self.occupied >> initial_index & 1:
             raise Exception("There is no piece at the initial position")
-        
-        if self.grid[final_pos[0]][final_pos[1]] is not None:
+
+        if self.occupied >> final_index & 1:
             raise Exception("There is piece at the final position")
 
-        self.grid[initial_pos[0]][initial_pos[1]].position = final_pos
-        self.grid[final_pos[0]][final_pos[1]] = self.grid[initial_pos[0]][initial_pos[1]]
-        self.grid[initial_pos[0]][initial_pos[1]] = None
-        
-        if abs(initial_pos[0] - final_pos[0]) == 2:
-            row_to_remove = (initial_pos[0] + final_pos[0]) // 2
-            column_to_remove = (initial_pos[1] + final_pos[1]) // 2
-            self.remove_piece(self.grid[row_to_remove][column_to_remove], game)
+        piece = self.cells[initial_index]
+        self._clear_cell(initial_index)
+        piece.position = final_pos
+        self._set_cell(final_index, piece)
+
+        # Removing the piece that has been jumped over. Kings may jump from
+        # a distance, so every cell between the two positions is checked.
+        captured = []
+        d_row = final_pos[0] - initial_pos[0]
+        d_col = final_pos[1] - initial_pos[1]
+        if abs(d_row) >= 2 and abs(d_row) == abs(d_col):
+            step = (d_row // abs(d_row)) * self.number_of_cols + d_col // abs(d_col)
+            for index in range(initial_index + step, final_index, step):
+                if self.occupied >> index & 1:
+                    captured.append(self.cells[index])
+                    self.remove_piece(self.cells[index], game)
         if final_pos[0] == 0 or final_pos[0] == self.number_of_rows -1:
-            self.grid[final_pos[0]][final_pos[1]].transform()
+            piece.transform()
+        return captured
 
     def place_piece(self, piece):
         """
@@ -58,14 +182,68 @@ class Board:
 
         Input:
             piece: (GamePiece) - the piece to be placed on the board
-        
+
         :raises: Exception if the piece cannot be placed
         """
-
-        if self.grid[piece.position[0]][piece.position[1]] is not None:
+        index = self.index(piece.position)
+        if self.occupied >> index & 1:
             raise Exception("There is already a piece at that position")
-        
-        self.grid[piece.position[0]][piece.position[1]] = piece
+
+        self._set_cell(index, piece)
+
+    def crown_piece(self, piece):
+        """
+        Turns a piece that is placed on the board into a king.
+
+        Input:
+            piece: (GamePiece) - the piece to be crowned
+        """
+        if piece.is_king:
+            return
+        piece.is_king = True
+        index = self.index(piece.position)
+        bit = 1 << index
+        self.men[piece.player] &= ~bit
+        self.kings[piece.player] = self.kings.get(piece.player, 0) | bit
+        self.men_count[piece.player] -= 1
+        self.king_count[piece.player] = self.king_count.get(piece.player, 0) + 1
+        men_keys, king_keys = self._piece_keys[piece.player]
+        self.key ^= men_keys[index] ^ king_keys[index]
+
+    def set_players(self, players):
+        """
+        Sets the players of the board, so that the pieces of every player are
+        hashed with the Zobrist keys of the player's seat. The key of the
+        position is recomputed, as the pieces already placed may have been
+        hashed by the order of placing.
+
+        Input:
+            players: list[Player] - the players in the order of their seats
+        """
+        self.players = players
+        self._piece_keys = {}
+        for slot, player in enumerate(players):
+            self._piece_keys[player] = self._zobrist.get_piece_keys(slot)
+        self.key = self.compute_key()
+
+    def compute_key(self):
+        """
+        Computes the Zobrist key of the position from scratch.
+        It always equals the key that is kept up to date by the board.
+        """
+        key = self._zobrist.side_key if self.side_to_move else 0
+        for index, piece in enumerate(self.cells):
+            if piece is not None:
+                men_keys, king_keys = self._piece_keys[piece.player]
+                key ^= king_keys[index] if piece.is_king else men_keys[index]
+        return key
+
+    def switch_side(self):
+        """
+        Passes the turn to the other player, updating the key of the position
+        """
+        self.side_to_move ^= 1
+        self.key ^= self._zobrist.side_key
 
     def is_on_grid(self, position):
         """
@@ -74,21 +252,13 @@ class Board:
 
         Input:
             pos - (int, int) is a position coordinates of the cell. Given as (row, col)
-        
+
         Output:
             True - if the cell is in range of board
             False - otherwise
         """
-        row_pos = position[0]
-        col_pos = position[1]
-
-        # Checking if the cell is out of bound
-        if not (0 <= row_pos < len(self.grid)):
-            return False
-        if not (0 <= col_pos < len(self.grid[0])):
-            return False
-
-        return True
+        return (0 <= position[0] < self.number_of_rows and
+                0 <= position[1] < self.number_of_cols)
 
     def is_empty_cell(self, pos):
         """
@@ -97,7 +267,7 @@ class Board:
 
         Input:
             pos - (int, int) is a position coordinates of the cell. Given as (row, col)
-        
+
         Output:
             True - if the cell is in range of board and also is not occupied
             False - otherwise
@@ -106,11 +276,8 @@ class Board:
         if not self.is_on_grid(pos):
             return False
 
-        row_pos = pos[0]
-        col_pos = pos[1]
-
         # Checking if the cell is occupied or not
-        return self.grid[row_pos][col_pos] is None
+        return not self.occupied >> self.index(pos) & 1
 
     def remove_piece(self, piece, game):
         """
@@ -120,12 +287,66 @@ class Board:
             piece: (GamePiece) - the piece to be removed from the board
 
             game: Game - the game object, so that the piece can be removed from the piece_dict
-        
+
         :raises: Exception if the piece cannot be removed
         """
         game.pieces_dict[piece.player].remove(piece)
-        if self.grid[piece.position[0]][piece.position[1]] is None:
+        self.lift_piece(piece)
+
+    def lift_piece(self, piece):
+        """
+        Takes a piece off the board, without removing it from the game.
+
+        Input:
+            piece: (GamePiece) - the piece to be taken off the board
+
+        :raises: Exception if the piece is not on the board
+        """
+        index = self.index(piece.position)
+        if self.cells[index] is not piece:
             raise Exception("There is no piece at that position")
 
+        self._clear_cell(index)
 
-        self.grid[piece.position[0]][piece.position[1]] = None
+    def _set_cell(self, index, piece):
+        """
+        Puts a piece to the cell with the given bit number and updates the masks
+        """
+        bit = 1 << index
+        if piece.player not in self._piece_keys:
+            # The player has no seat on the board (yet)
+            self._piece_keys[piece.player] = self._zobrist.get_piece_keys(
+                len(self._piece_keys))
+        men_keys, king_keys = self._piece_keys[piece.player]
+        if piece.is_king:
+            self.kings[piece.player] = self.kings.get(piece.player, 0) | bit
+            self.king_count[piece.player] = self.king_count.get(piece.player, 0) + 1
+            self.key ^= king_keys[index]
+        else:
+            self.men[piece.player] = self.men.get(piece.player, 0) | bit
+            self.men_count[piece.player] = self.men_count.get(piece.player, 0) + 1
+            self.key ^= men_keys[index]
+        self.occupied |= bit
+        self.cells[index] = piece
+        piece.board = self
+        self._grid = None
+
+    def _clear_cell(self, index):
+        """
+        Empties the cell with the given bit number and updates the masks
+        """
+        piece = self.cells[index]
+        bit = 1 << index
+        men_keys, king_keys = self._piece_keys[piece.player]
+        if piece.is_king:
+            self.kings[piece.player] &= ~bit
+            self.king_count[piece.player] -= 1
+            self.key ^= king_keys[index]
+        else:
+            self.men[piece.player] &= ~bit
+            self.men_count[piece.player] -= 1
+            self.key ^= men_keys[index]
+        self.occupied &= ~bit
+        self.cells[index] = None
+        piece.board = None
+        self._grid = None
@@ -1,8 +1,12 @@
 from random import randint
-from src.player import Player
-from src.board import Board
-from src.game import Game
-from src.game_piece import GamePiece
+from time import perf_counter
+import numpy as np
+from player import Player
+from board import Board
+from game import Game
+from game_piece import GamePiece
+from transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND
+from attack_map import AttackMap
 
 from math import inf
 # https://hobbylark.com/board-games/Checkers-Strategy-Tactics-How-To-Win - strategy source
@@ -22,6 +26,8 @@ class CheckersBot(Player):
     """
     def __init__(self, name: str, color: str):
         super().__init__(name=name, color=color)
+        # coordinates of the enemy pieces of the current turn, see _get_enemy_coordinates
+        self._turn = None
 
     def choose_move(self, board: Board, possible_moves: list):
         """
@@ -75,35 +81,19 @@ class CheckersBot(Player):
     def aggressive_moves(self, valid_moves: list, board: Board):
         """
         picks the most aggressive move, by choosing the move which minimizes distance to all of the enemy pieces
+        The distances of all the moves to all the enemy pieces are computed at once
         :param: valid_moves: all of the moves that are accessible to the given bot
         :param: board: Board class instance: current game_board
         :return: list(moves): list of moves which are the best by given metric
         """
+        enemies = self._get_enemy_coordinates(board, valid_moves[0][0].player)
+        if len(enemies) == 0:
+            return list(valid_moves)
 
-        best_moves = []
-        lowest_distance = inf
-
-        for move in valid_moves:
-
-            coordinates_of_move = move[1][-1]
-            cumulative_linear_distance = 0
-
-            for row in board.grid:
-                for piece in row:
-                    if piece is None:
-                        pass
-                    else:
-                        # calculates sum of squared linear distnaces to every enemy pice
-                        cumulative_linear_distance += (coordinates_of_move[0] - piece.position[0])**2 + \
-                                                      (coordinates_of_move[1] - piece.position[1])**2
-
-                        if cumulative_linear_distance == lowest_distance:
-                            # if the distance is the same to enemy pieces, this move is one of the most aggressive
-                            best_moves.append(move)
-                        elif cumulative_linear_distance < lowest_distance:
-                            # if the distance is smaller than for other moves this move is the most aggressive
-                            best_moves.append(move)
-        return best_moves
+        destinations = np.array([move[1][-1] for move in valid_moves])
+        # sum of squared linear distances from every destination to every enemy piece
+        distances = ((destinations[:, None, :] - enemies[None, :, :]) ** 2).sum(axis=(1, 2))
+        return [valid_moves[i] for i in np.flatnonzero(distances == distances.min())]
 
     def check_if_back_pieces(self, valid_moves: list, row_num: int):
         """
@@ -123,49 +113,44 @@ class CheckersBot(Player):
     def check_if_danger(self, valid_moves: list, board: Board):
         """
         returns all the moves that do not put the piece in danger of being captured
+        The cells the opponent could capture on are found once for the position
+        (see AttackMap), so that every move is checked with a lookup
         :param: valid_moves: list of valid moves available for the bot
         :param: board Board: game board which is currently played
         :return: list of all moves that are not loosing a piece
         """
+        attack_map = AttackMap(board, valid_moves[0][0].player)
+        return [move for move in valid_moves
+                if attack_map.is_safe_move(move[0].position, move[1][-1])]
 
-        best_moves = []
-        current_player = valid_moves[0][0].player
-
-        for move in valid_moves:
-
-            current_piece = move[0]
-            coordinates = move[1][-1]
+    def _get_enemy_coordinates(self, board: Board, player):
+        """
+        returns the coordinates of the enemy pieces as an array. They are found once
+        per position and reused by all the heuristics of the turn
+        :param: board Board: game board which is currently played
+        :param: player: Player: the player who is to move
+        :return: np.ndarray: (row, col) coordinates of the enemy pieces
+        """
+        turn = (board, board.key, player)
+        if self._turn is not None and self._turn[0] == turn:
+            return self._turn[1]
 
-            if coordinates[1] in (0, board.number_of_cols-1) or coordinates[0] in (0, board.number_of_rows-1):
-                # if the move moves to the edge it is a safe move
-                best_moves.append(move)
-            else:
-                # if it is not an edge move we have to check if it is safe to make this move
-                validity = True
-                diagonals = [(board.grid[coordinates[0]+1][coordinates[1]+1], board.grid[coordinates[0]-1][coordinates[1]-1]),
-                             (board.grid[coordinates[0]+1][coordinates[1]-1], board.grid[coordinates[0]-1][coordinates[1]+1])]
-
-                for diagonal in diagonals:
-                    # diagonal is a tuple of two objects that are placed on the squares
-                    # adjacent to the square the move wants us to move
-                    # and are on the same diagonal
-                    # if one square on the diagonal is empty and one has the enemy piece
-                    # then the moving piece can be captured and hence the move is
-                    # disqualified as a safe move
-                    if diagonal[0] != None:
-                        if (diagonal[1] is None or diagonal[1] == current_piece) and diagonal[0].player != current_player:
-                            validity = False
-                            break
-
-                    if diagonal[1] != None:
-                        if (diagonal[0] is None or diagonal[0]) and diagonal[1].player != current_player:
-                            validity = False
-                            break
-
-                if validity:
-                    best_moves.append(move)
+        enemy_mask = board.occupied & ~board.player_mask(player)
+        enemy_cells = np.array(self._get_cells(enemy_mask), dtype=np.int64)
+        enemies = np.stack(np.divmod(enemy_cells, board.number_of_cols), axis=1)
+        self._turn = (turn, enemies)
+        return enemies
 
-        return best_moves
+    def _get_cells(self, mask: int):
+        """
+        returns the bit numbers of the cells of a mask, in increasing order
+        """
+        cells = []
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            cells.append(bit.bit_length() - 1)
+        return cells
 
     def best_jump(self, valid_moves: list):
         """
@@ -202,6 +187,295 @@ class CheckersBot(Player):
         return best_moves
 
 
+class AlphaBetaBot(Player):
+    """
+    AlphaBetaBot is a child class of Player which looks ahead: it runs a negamax search
+    with alpha-beta pruning, deepening the search one ply at a time until its budget runs out
+    Public attributes:
+        name: str - name of the player, continuation of player interface
+        color: color of the pieces of a given bot
+        game: Game - the game the bot plays, it has to be set before choose_move is called
+        time_limit: float - number of seconds the bot may think about a move
+        max_nodes: int - number of positions the bot may search per move (None for no limit)
+        max_depth: int - the deepest iteration the bot will search to
+        transposition_table: TranspositionTable - results of searched positions, reused
+                             across the iterations and moves (None to search without it)
+        nodes: int - number of positions searched for the last move
+        depth_reached: int - depth of the last completed iteration for the last move
+    Evaluation:
+    1. Material, with kings worth more than men
+    2. Men that have crossed into the opponent's half of the board
+    3. Men that still guard the back row
+    """
+    MAN_VALUE = 100
+    KING_VALUE = 160
+    ADVANCED_MAN_VALUE = 10
+    BACK_ROW_VALUE = 5
+    WIN_SCORE = 100000
+    # part of the time limit kept back for unwinding the search and returning the move
+    SAFETY_MARGIN = 0.1
+    # number of positions searched between two looks at the clock
+    CLOCK_INTERVAL = 16
+
+    def __init__(self, name: str, color: str, time_limit=0.1, max_nodes=None, max_depth=64,
+                 transposition_table=None):
+        super().__init__(name=name, color=color)
+        self.game = None
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.transposition_table = transposition_table
+        self.nodes = 0
+        self.depth_reached = 0
+        self._deadline = 0
+        self._stopped = False
+        # set by stop, and never cleared
+        self._stop_requested = False
+        self._masks = {}
+
+    def choose_move(self, board: Board, possible_moves: list):
+        """
+        chooses the best move found within the time and node budget
+        :param: board Board class instance: current game_board
+        :param: possible_moves list of moves
+        :return: tuple(GamePiece, [tuple(int, int)]):  a move in a move format specified in the design
+        """
+        if self.game is None:
+            raise Exception("The game of the bot has to be set before it chooses a move")
+
+        self.nodes = 0
+        self.depth_reached = 0
+        self._stopped = False
+        self._deadline = perf_counter() + self.time_limit * (1 - self.SAFETY_MARGIN)
+        if len(possible_moves) == 1:
+            return possible_moves[0]
+
+        best_move = possible_moves[0]
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+            entry = self.transposition_table.probe(self.game.board.key)
+            if entry is not None:
+                best_move = self._find_move(possible_moves, entry[4], best_move)
+        for depth in range(1, self.max_depth + 1):
+            # the best move of the previous iteration is searched first
+            ordered_moves = [best_move] + [move for move in possible_moves if move is not best_move]
+            score, move = self._search_root(ordered_moves, depth)
+            if move is not None:
+                best_move = move
+            if self._stopped:
+                break
+            self.depth_reached = depth
+            if abs(score) >= self.WIN_SCORE - self.max_depth:
+                # the outcome of the game is already known
+                break
+        return best_move
+
+    def stop(self):
+        """
+        stops the search of choose_move, which then returns the best move found so far.
+        It may be called from another thread than the one the bot searches in. The bot
+        stays stopped: a search that starts later returns right away, so a bot that is
+        stopped from another thread is a copy made for that search (see BotThinker)
+        """
+        self._stop_requested = True
+
+    def _search_root(self, moves: list, depth: int):
+        """
+        searches every move at the root of the search tree
+        :param: moves: list of moves to search, in the order they are searched
+        :param: depth: int: depth of the search
+        :return: tuple(int, move): score of the best move and the move itself. If the search
+                 was stopped, the move is None unless some move beat the first one searched
+        """
+        game = self.game
+        opponent = self._get_opponent(self)
+        alpha = -inf
+        best_move = None
+        for index, move in enumerate(moves):
+            game.make_move(move, undoable=True)
+            score = -self._negamax(opponent, depth - 1, -inf, -alpha, 1)
+            game.unmake_move()
+            if self._stopped:
+                # a partially searched move can not be trusted, the moves searched
+                # before it can, as long as they beat the first move
+                if index == 0:
+                    best_move = None
+                break
+            if score > alpha:
+                alpha = score
+                best_move = move
+        if not self._stopped and self.transposition_table is not None:
+            self.transposition_table.store(game.board.key, depth, EXACT, self._score_to_table(alpha, 0),
+                                           self._get_move_key(best_move))
+        return alpha, best_move
+
+    def _negamax(self, player, depth: int, alpha, beta, ply: int):
+        """
+        scores the position from the point of view of the player to move
+        :param: player: Player: the player to move
+        :param: depth: int: remaining depth of the search
+        :param: alpha: lower bound of the score the player is already guaranteed
+        :param: beta: upper bound of the score the opponent is already guaranteed
+        :param: ply: int: distance from the root of the search
+        :return: int: score of the position
+        """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            self._stopped = True
+        elif self._stop_requested:
+            self._stopped = True
+        elif self.nodes % self.CLOCK_INTERVAL == 0 and perf_counter() >= self._deadline:
+            self._stopped = True
+        if self._stopped:
+            return 0
+
+        game = self.game
+        table = self.transposition_table
+        table_move = None
+        if table is not None:
+            entry = table.probe(game.board.key)
+            if entry is not None:
+                table_move = entry[4]
+                if entry[1] >= depth:
+                    score = self._score_from_table(entry[3], ply)
+                    if entry[2] == EXACT:
+                        return score
+                    if entry[2] == LOWER_BOUND and score >= beta:
+                        return score
+                    if entry[2] == UPPER_BOUND and score <= alpha:
+                        return score
+
+        moves = game.get_possible_moves(player)
+        if len(moves) == 0:
+            # the player has lost, the sooner the worse
+            return -self.WIN_SCORE + ply
+        if depth <= 0 and not self.game.is_jump(moves[0]):
+            # jumps are forced, so the search goes on until the position is quiet
+            return self._evaluate(player)
+
+        if table_move is not None:
+            first_move = self._find_move(moves, table_move, None)
+            if first_move is not None:
+                moves = [first_move] + [move for move in moves if move is not first_move]
+
+        opponent = self._get_opponent(player)
+        original_alpha = alpha
+        best_score = -inf
+        best_move = None
+        for move in moves:
+            game.make_move(move, undoable=True)
+            score = -self._negamax(opponent, depth - 1, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if self._stopped:
+                return 0
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if table is not None:
+            if best_score <= original_alpha:
+                bound = UPPER_BOUND
+            elif best_score >= beta:
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            table.store(game.board.key, depth, bound, self._score_to_table(best_score, ply),
+                        self._get_move_key(best_move))
+        return best_score
+
+    def _score_to_table(self, score, ply: int):
+        """
+        converts the score of a won or lost position into the distance to the end of the game
+        from the current position rather than from the root, so that it can be reused anywhere
+        """
+        if score >= self.WIN_SCORE - 1000:
+            return score + ply
+        if score <= -self.WIN_SCORE + 1000:
+            return score - ply
+        return score
+
+    def _score_from_table(self, score, ply: int):
+        """
+        converts the score stored by _score_to_table back into a score relative to the root
+        """
+        if score >= self.WIN_SCORE - 1000:
+            return score - ply
+        if score <= -self.WIN_SCORE + 1000:
+            return score + ply
+        return score
+
+    def _get_move_key(self, move):
+        """
+        returns the key the move is stored under in the transposition table:
+        the position of the piece and the path of the move
+        """
+        return (move[0].position, tuple(move[1]))
+
+    def _find_move(self, moves: list, move_key, default):
+        """
+        finds the move stored under the given key in the transposition table
+        :param: moves: list of moves to look in
+        :param: move_key: the key of the move, as returned by _get_move_key
+        :param: default: the value returned if there is no such move
+        :return: the move with the given key
+        """
+        for move in moves:
+            if self._get_move_key(move) == move_key:
+                return move
+        return default
+
+    def _evaluate(self, player):
+        """
+        scores the position statically from the point of view of the player
+        :param: player: Player: the player the position is scored for
+        :return: int: score of the position
+        """
+        board = self.game.board
+        score = 0
+        for current_player, sign in ((player, 1), (self._get_opponent(player), -1)):
+            men = board.men.get(current_player, 0)
+            men_count, king_count = board.count_pieces(current_player)
+            advanced_mask, back_row_mask = self._get_masks(board, current_player)
+            score += sign * (self.MAN_VALUE * men_count +
+                             self.KING_VALUE * king_count +
+                             self.ADVANCED_MAN_VALUE * (men & advanced_mask).bit_count() +
+                             self.BACK_ROW_VALUE * (men & back_row_mask).bit_count())
+        return score
+
+    def _get_masks(self, board: Board, player):
+        """
+        returns the masks used by the evaluation for the given player
+        :param: board: Board class instance: current game_board
+        :param: player: Player: the player the masks are for
+        :return: tuple(int, int): mask of the opponent's half of the board
+                 and mask of the player's back row
+        """
+        is_first = self.game.players.index(player) % 2 == 0
+        key = (board.number_of_rows, board.number_of_cols, is_first)
+        if key not in self._masks:
+            row_mask = (1 << board.number_of_cols) - 1
+            half = board.number_of_rows // 2
+            if is_first:
+                advanced_mask = board.full_mask & ~((1 << (half * board.number_of_cols)) - 1)
+                back_row_mask = row_mask
+            else:
+                advanced_mask = (1 << ((board.number_of_rows - half) * board.number_of_cols)) - 1
+                back_row_mask = row_mask << ((board.number_of_rows - 1) * board.number_of_cols)
+            self._masks[key] = (advanced_mask, back_row_mask)
+        return self._masks[key]
+
+    def _get_opponent(self, player):
+        """
+        returns the player that moves after the given one
+        """
+        players = self.game.players
+        return players[(players.index(player) + 1) % len(players)]
+
+
 class RandomBot(Player):
     """
     A bot that is able to make random moves, made for the tests
@@ -225,9 +499,10 @@ def main():
     player_1 = CheckersBot("Player 1", "white")
     player_2 = RandomBot("Player 2", "black")
     players = [player_1, player_2]
-    game = Game(players, 3, 8)
     clever_won = 0
     for i in range(100):
+            # every game is played on a new board
+            game = Game(players, 3, 8)
             while True:
                 moves = game.get_possible_moves(players[0])
                 if len(moves) == 0:
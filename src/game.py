@@ -1,5 +1,63 @@
+import copy
+
 from board import Board
 from game_piece import GamePiece
+from move import Move
+from piece_set import PieceSet
+from attack_map import AttackMap
+
+
+class MoveRecord:
+    """
+    This class stores everything that is needed to take a move back.
+
+    Public attributes of this class:
+    - move: the move that has been made.
+
+    - piece: the game piece that has been moved.
+
+    - initial_pos: (int, int) position of the piece before the move.
+
+    - was_king: whether the piece was a king before the move.
+
+    - captured: list of game pieces removed from the board by the move,
+                in the order they have been captured.
+    """
+
+    def __init__(self, move, piece, initial_pos, was_king):
+        self.move = move
+        self.piece = piece
+        self.initial_pos = initial_pos
+        self.was_king = was_king
+        self.captured = []
+
+
+class PlayOutResult:
+    """
+    This class stores how a game played out by Game.play_out has ended.
+
+    Public attributes of this class:
+    - winner: the player who has won, or None for a draw.
+
+    - reason: why the game has ended, one of
+              "no-moves" (the player to move has no moves and lost),
+              "repetition" (the same position occurred too many times),
+              "no-capture" (too many moves have been made without a capture),
+              "max-plies" (the limit of moves has been reached).
+
+    - plies: number of moves made by play_out.
+    """
+    __slots__ = ("winner", "reason", "plies")
+
+    def __init__(self, winner, reason, plies):
+        self.winner = winner
+        self.reason = reason
+        self.plies = plies
+
+    def __repr__(self):
+        return f"PlayOutResult({self.winner!r}, {self.reason!r}, {self.plies})"
+
+
 class Game:
     """
     This class represents a collection of functionality
@@ -15,19 +73,37 @@ class Game:
 
     - board: Board object created from the input data.
     
-    - pieces_dict: dictionary of game pieces.
+    - pieces_dict: dictionary mapping every player to the PieceSet of their
+                   game pieces that are on the board.
+
+    - undo_stack: list of MoveRecords of the moves made with undoable=True,
+                  the last move on top. Moves made without it are not kept,
+                  so games that never take moves back do not grow the stack.
+
+    The moves found are cached: the list of moves of a player is kept for the
+    position it was found in (identified by the key of the board), so that
+    repeated queries within a turn are free. As the same position may be
+    reached with other GamePieces on the cells (e.g. two kings swapping their
+    places), the pieces of a cached list are checked against the board, and
+    taken from the board if they differ.
     """
 
     def __init__(self, players, number_populated_rows, width=8):
         self.players = players
         self.number_populated_rows = number_populated_rows
         self.width = width
-        self.board = Board(number_populated_rows*2 + 2, width)
+        self.board = Board(number_populated_rows*2 + 2, width, players)
         self.pieces_dict = {}
+        self.undo_stack = []
+
+        # Cache of the found moves: the moves of every player by position
+        self._moves_cache = {}
+        # The attack maps of the players, kept for the position they were built in
+        self._attack_maps = {}
 
         # Setting up the pieces_dict
         for player in self.players:
-            self.pieces_dict[player] = []
+            self.pieces_dict[player] = PieceSet()
 
         # Setting the board with pieces
         self.__populate_board()
@@ -38,23 +114,28 @@ class Game:
         :param piece
             the specific game piece for which the moves are found
         :returns
-            either list[(int,int)] which is a list of tuples of coordinates, representing moves,
-            or None
+            list[(piece, [(int, int)])] - the non-jump moves of the piece, empty if
+            the piece is not on the board of the game
         """
-        player = piece.player
-        direction = 1 if (self.players.index(player) % 2 == 0) else -1
-        current_position = piece.position
+        board = self.board
+        if not board.is_on_grid(piece.position):
+            return []
+        index = board.index(piece.position)
+        if board.cells[index] is not piece:
+            return []
+
+        direction = self.__get_direction(piece.player)
+        bit = 1 << index
+        empty = board.empty_mask()
+        row, col = piece.position
         possible_move = []
 
-        if self.board.is_empty_cell((current_position[0] + direction, current_position[1] + 1)):
-            possible_move.append((piece, [(current_position[0] + direction, current_position[1] + 1)]))
-        if self.board.is_empty_cell((current_position[0] + direction, current_position[1] - 1)):
-            possible_move.append((piece, [(current_position[0] + direction, current_position[1] - 1)]))
+        steps = ((direction, 1), (direction, -1))
         if piece.is_king:
-            if self.board.is_empty_cell((current_position[0] - direction, current_position[1] + 1)):
-                possible_move.append((piece, [(current_position[0] - direction, current_position[1] + 1)]))
-            if self.board.is_empty_cell((current_position[0] - direction, current_position[1] - 1)):
-                possible_move.append((piece, [(current_position[0] - direction, current_position[1] - 1)]))
+            steps += ((-direction, 1), (-direction, -1))
+        for d_row, d_col in steps:
+            if board.shift(bit, d_row, d_col) & empty:
+                possible_move.append(Move(piece, [(row + d_row, col + d_col)]))
         return possible_move
 
     def get_possible_jumps_for_piece(self, piece):
@@ -66,76 +147,127 @@ class Game:
             either list[(int,int)] which is a list of tuples of coordinates, representing jumps,
             or None
         """
-        unsorted_moves = self.get_all_jumps_moves(piece.position, piece)
+        cached_moves = self.__get_cached_moves(piece.player)
+        if cached_moves is not None:
+            # The cached moves of the player are either all of their jumps or none
+            if cached_moves != [] and self.is_jump(cached_moves[0]):
+                return [move for move in cached_moves if move.piece is piece]
+            return []
 
-        sorted_moves = []
-        for unsorted_move in unsorted_moves:
-            new_move = []
-            while unsorted_move != []:
-                new_move.append(unsorted_move[0])
-                unsorted_move = unsorted_move[1]
-            if new_move != []:
-                sorted_moves.append(new_move)
-        
-        moves_formatted = []
-        for move in sorted_moves:
-            moves_formatted.append([piece, move])
-        return moves_formatted
+        return [Move(piece, path) for path in self.get_all_jumps_moves(piece.position, piece)]
 
-    def get_all_jumps_moves (self, start_pos, piece, blocked_pos=[]):
+    def get_all_jumps_moves(self, start_pos, piece):
         """
         finds all possible jumps for a given piece
+        The chains of jumps are searched depth-first with an explicit stack.
+        Every entry of the stack keeps the cells captured on its way, so a piece
+        is never jumped over twice in the same chain (the captured pieces stay
+        on the board until the move is made, so they cannot be jumped over
+        again, nor can kings slide through them).
         :param start_pos
             the starting position of the piece
         :param piece
             the specific game piece for which the jumps are found
-        :param blocked_pos
-            a list of coordinates which the piece cannot jump over.
         :returns
-            either list[(int,int)] which is a list of tuples of coordinates, representing jumps,
-            or None
+            list[list[(int, int)]] - the paths of the jumps: every path is the
+            list of the cells the piece lands on, one for every piece jumped
+            over. The list is empty if the piece cannot jump.
         """
+        board = self.board
         player = piece.player
-        direction = -1 if (self.players.index(player) % 2 == 0) else 1
-        if piece.is_king:
-            possible_pieces_moves = ((1, 1) , (1, -1), (-1, 1), (-1, -1))
+        is_king = piece.is_king
+        direction = self.__get_direction(player)
+        if is_king:
+            steps = ((1, 1), (1, -1), (-1, 1), (-1, -1))
         else:
-            possible_pieces_moves = ((-1 * direction, -1 * direction), (-1 * direction, 1 * direction))
-
-        possible_moves = []
-        for coords in possible_pieces_moves:
-                potential_final_pos = (coords[0] + start_pos[0], coords[1] + start_pos[1])
-                if piece.is_king:
-                    while self.board.is_empty_cell(potential_final_pos):
-                        potential_final_pos = (coords[0] + potential_final_pos[0], coords[1] + potential_final_pos[1])
-
-                if self.board.is_on_grid(potential_final_pos):
-                    # If the final position contains enemy piece
-                    if not self.board.is_empty_cell(potential_final_pos):
-                        if self.board.grid[potential_final_pos[0]][potential_final_pos[1]].player!= player:
-
-                            # We need to check if we can make a move in that direction over that piece
-                            potential_jump_pos = (coords[0] + potential_final_pos[0] , coords[1] + potential_final_pos[1])
-                            if self.board.is_empty_cell(potential_jump_pos):
-                                if piece.is_king and potential_final_pos in blocked_pos:
-                                    continue
-                                # Add move to the list of possible moves
-                                possible_moves.append((potential_jump_pos))
-                                blocked_pos.append(potential_final_pos)
-        if len(possible_moves) > 0:
-            list_of_moves = []
-            for move in possible_moves:
-                if piece.is_king:
-                    kol = self.get_all_jumps_moves(move, piece, blocked_pos=blocked_pos)
-                else:
-                    kol = self.get_all_jumps_moves(move, piece)
-                if kol == []:
-                    list_of_moves.append([move, []])
-                for item in kol:
-                    list_of_moves.append([move, item])
-            return list_of_moves
-
-        return possible_moves
+            steps = ((direction, direction), (direction, -direction))
+
+        shift = board.shift
+        empty = board.empty_mask()
+        enemies = board.occupied & ~board.player_mask(player)
+
+        paths = []
+        # Every entry: (bit of the cell the piece stands on, mask of the cells
+        # captured so far, the path up to that cell)
+        stack = [(1 << board.index(start_pos), 0, [])]
+        while stack:
+            bit, captured, path = stack.pop()
+            next_jumps = []
+            for d_row, d_col in steps:
+                target_bit = shift(bit, d_row, d_col)
+                if is_king:
+                    # Kings slide over the empty cells towards the piece to jump over
+                    while target_bit & empty:
+                        target_bit = shift(target_bit, d_row, d_col)
+                if target_bit & enemies and not target_bit & captured:
+                    jump_bit = shift(target_bit, d_row, d_col)
+                    if jump_bit & empty:
+                        next_jumps.append((jump_bit, captured | target_bit,
+                                           path + [board.position(jump_bit.bit_length() - 1)]))
+            if next_jumps:
+                # Reversed, so that the chains come out in the order of the steps
+                next_jumps.reverse()
+                stack += next_jumps
+            elif path:
+                paths.append(path)
+        return paths
+
+    def iter_moves(self, player):
+        """
+        yields the possible moves of a given player one by one, so that the
+        moves which are not needed are never found. The jumps come first, and
+        as jumps are mandatory, the other moves are only found if there are none.
+        The board must not be changed while the moves are iterated.
+        :param player
+            Player for whom possible moves are found
+        :yields
+            Move - a piece and the path of its move
+        """
+        cached_moves = self.__get_cached_moves(player)
+        if cached_moves is not None:
+            yield from cached_moves
+            return
+
+        has_jumps = False
+        for move in self.__iter_jumps(player):
+            has_jumps = True
+            yield move
+        if has_jumps:
+            return
+
+        # All the pieces of the player are moved at once, one direction at a time
+        board = self.board
+        cells = board.cells
+        cols = board.number_of_cols
+        direction = self.__get_direction(player)
+        men = board.men.get(player, 0)
+        kings = board.kings.get(player, 0)
+        empty = board.empty_mask()
+        for d_row, d_col, movers in ((direction, 1, men | kings),
+                                     (direction, -1, men | kings),
+                                     (-direction, 1, kings),
+                                     (-direction, -1, kings)):
+            targets = board.shift(movers, d_row, d_col) & empty
+            offset = d_row * cols + d_col
+            while targets:
+                target_bit = targets & -targets
+                targets ^= target_bit
+                final_index = target_bit.bit_length() - 1
+                yield Move(cells[final_index - offset], [divmod(final_index, cols)])
+
+    def has_any_move(self, player):
+        """
+        checks if a given player can make a move, stopping at the first move found
+        :param player
+            Player for whom the moves are checked
+        :returns
+            bool - True if the player has at least one possible move
+        """
+        if self.board.count_pieces(player) == (0, 0):
+            return False
+        for _ in self.iter_moves(player):
+            return True
+        return False
 
     def get_possible_moves(self, player):
         """
@@ -146,12 +278,15 @@ class Game:
             list[(piece, [(int, int)])] - list of tuples that show a piece and a possible move coordinate
             if jumps are possible returns only jump-moves
         """
-        list_to_return = self.get_all_jumps(player)
-        if list_to_return != []:
-            return list_to_return
-        for piece in self.pieces_dict[player]:
-            list_to_return += self.get_possible_moves_for_piece(piece)
-        return list_to_return
+        cached_moves = self.__get_cached_moves(player)
+        if cached_moves is not None:
+            return list(cached_moves)
+
+        board = self.board
+        list_to_return = list(self.iter_moves(player))
+        origins = [board.index(move.piece.position) for move in list_to_return]
+        self._moves_cache[player] = (board, board.key, list_to_return, origins)
+        return list(list_to_return)
 
     def get_all_jumps(self, player):
         """
@@ -163,10 +298,149 @@ class Game:
             or None if no 'jump-moves' are found
 
         """
-        list_to_return = []
-        for piece in self.pieces_dict[player]:
-            list_to_return += self.get_possible_jumps_for_piece(piece)
-        return list_to_return
+        cached_moves = self.__get_cached_moves(player)
+        if cached_moves is not None:
+            if cached_moves != [] and self.is_jump(cached_moves[0]):
+                return list(cached_moves)
+            return []
+
+        return list(self.__iter_jumps(player))
+
+    def __iter_jumps(self, player):
+        """
+        yields the jump-moves of a given player one by one
+        :param player
+            Player for whom possible jumps are found
+        :yields
+            Move - a piece and the path of its jump
+        """
+        cells = self.board.cells
+        for index in self.__get_jumping_cells(player):
+            piece = cells[index]
+            for path in self.get_all_jumps_moves(piece.position, piece):
+                yield Move(piece, path)
+
+    def __get_jumping_cells(self, player):
+        """
+        Finds the cells of the pieces of a player that may be able to jump.
+        Men are filtered with the masks of the board, all kings are returned,
+        as they can jump from a distance.
+        :param player
+            Player for whom the cells are found
+        :returns
+            list[int] - bit numbers of the cells, in increasing order
+        """
+        board = self.board
+        direction = self.__get_direction(player)
+        men = board.men.get(player, 0)
+        empty = board.empty_mask()
+        enemies = board.occupied & ~board.player_mask(player)
+
+        jumping = board.kings.get(player, 0)
+        for d_col in (1, -1):
+            over = board.shift(men, direction, d_col) & enemies
+            landing = board.shift(over, direction, d_col) & empty
+            # Shifting the landing cells back to where the men stand
+            jumping |= board.shift(board.shift(landing, -direction, -d_col),
+                                   -direction, -d_col)
+
+        cells = []
+        while jumping:
+            bit = jumping & -jumping
+            jumping ^= bit
+            cells.append(bit.bit_length() - 1)
+        return cells
+
+    def __get_cached_moves(self, player):
+        """
+        Returns the cached list of moves of a player, if it has been found in
+        the current position, otherwise None. The list must not be changed.
+        """
+        self.__check_board_players()
+        board = self.board
+        cached = self._moves_cache.get(player)
+        if cached is None or cached[0] is not board or cached[1] != board.key:
+            return None
+
+        cached_moves, origins = cached[2], cached[3]
+        cells = board.cells
+        for move, origin in zip(cached_moves, origins):
+            if cells[origin] is not move.piece:
+                break
+        else:
+            return cached_moves
+
+        # The position is the same, but other pieces stand on the cells
+        cached_moves = [Move(cells[origin], move.path)
+                        for move, origin in zip(cached_moves, origins)]
+        self._moves_cache[player] = (board, board.key, cached_moves, origins)
+        return cached_moves
+
+    def clear_move_cache(self):
+        """
+        Drops all the cached moves (and attack maps), so that they are found from scratch.
+        """
+        self._moves_cache = {}
+        self._attack_maps = {}
+
+    def copy(self, players=None):
+        """
+        Returns a copy of the game in the same position, with its own board
+        and pieces but the same players, so that moves can be made on it
+        (e.g. by a bot searching in another thread) without changing this game.
+        The moves taken back with unmake_move are copied as well.
+        :param players
+            dict of the players that are replaced in the copy (e.g. by copies
+            of the bots) by the players of this game, or None
+        """
+        players = {} if players is None else players
+        memo = {id(player): players.get(player, player) for player in self.players}
+        game = copy.deepcopy(self, memo)
+        game.clear_move_cache()
+        return game
+
+    def __check_board_players(self):
+        """
+        Makes sure the board hashes the pieces by the seats of the players of
+        this game, also when the board has been replaced after creation.
+        """
+        if self.board.players is not self.players:
+            self.board.set_players(self.players)
+
+    def get_attack_map(self, player):
+        """
+        returns the attack map of the current position: the cells where the
+        pieces of a given player could be captured by the opponents
+        :param player
+            Player whose pieces are attacked
+        :returns
+            AttackMap - the map, which is built once per position
+        """
+        self.__check_board_players()
+        board = self.board
+        cached = self._attack_maps.get(player)
+        if cached is not None and cached[0] is board and cached[1] == board.key:
+            return cached[2]
+        attack_map = AttackMap(board, player)
+        self._attack_maps[player] = (board, board.key, attack_map)
+        return attack_map
+
+    def is_jump(self, move):
+        """
+        Checks if a move is a jump-move: jumps always cover at least two rows
+        :param move
+            (piece, [(int, int)]) - a move of a piece that stands on the board
+        :returns
+            bool - True if the move jumps over pieces
+        """
+        return abs(move[0].position[0] - move[1][0][0]) >= 2
+
+    def __get_direction(self, player):
+        """
+        Returns the direction in which the men of a player move along the rows:
+        1 for the first player (downwards) and -1 for the second one.
+        """
+        return 1 if (self.players.index(player) % 2 == 0) else -1
     
     def __populate_board(self):
         """
@@ -188,20 +462,120 @@ class Game:
 
                 self.pieces_dict[self.players[1]].append(second_piece)
 
-    def make_move(self, move):
+    def make_move(self, move, undoable=False):
         """
         Moves a Game_Piece from initial position to final position on the grid
         removes a Piece from the board if the 'jump-move' was performed
-        :param initial_pos:
-            (int, int) - represents the coordinates of the piece as (row, col)
-        :param final_pos:
-            (int, int) - represents the coordinates of the piece as (row, col)
+        :param move:
+            (piece, [(int, int)]) - the piece to move and the path of the move
+        :param undoable:
+            bool - if True, the record of the move is pushed to the undo_stack,
+            so that the move can be taken back with unmake_move
         :returns
-            None
+            MoveRecord - the record of the move
         """
+        self.__check_board_players()
         piece = move[0]
         list_of_movements = move[1]
+        record = MoveRecord(move, piece, piece.position, piece.is_king)
         for transposition in list_of_movements:
-            self.board.move_piece(piece.position, transposition, self)
+            record.captured += self.board.move_piece(piece.position, transposition, self)
+        self.board.switch_side()
+        if undoable:
+            self.undo_stack.append(record)
+        return record
+
+    def play_out(self, players=None, max_plies=1000, max_plies_without_capture=100,
+                 repetitions=3, on_move=None):
+        """
+        Plays the game from the current position until it ends, without any
+        input or output: the players choose their moves in turns, starting
+        with the player to move. The game is a draw if the same position
+        (with the same player to move) occurs the given number of times, or if
+        no piece has been captured for the given number of moves.
+        :param players:
+            list - the objects choosing the moves for the seats of the game
+            (anything with choose_move(board, possible_moves), for example
+            wrappers of the players). By default the players of the game.
+        :param max_plies:
+            int - number of moves after which the game is a draw
+        :param max_plies_without_capture:
+            int - number of moves without a capture after which the game is a draw
+        :param repetitions:
+            int - number of occurrences of a position after which the game is a draw
+        :param on_move:
+            function called with the MoveRecord of every move right after it
+            is made (for example GameRecordWriter.write_move), or None
+        :returns
+            PlayOutResult - how the game has ended
+        """
+        self.__check_board_players()
+        if players is None:
+            players = self.players
+        seats = self.players
+        board = self.board
+        get_possible_moves = self.get_possible_moves
+        make_move = self.make_move
+
+        # Occurences of the positions since the last move that cannot be
+        # taken back by the rules (a capture or a move of a man)
+        occurrences = {board.key: 1}
+        plies = 0
+        plies_without_capture = 0
+        while True:
+            side = board.side_to_move
+            moves = get_possible_moves(seats[side])
+            if not moves:
+                return PlayOutResult(seats[1 - side], "no-moves", plies)
+            if plies >= max_plies:
+                return PlayOutResult(None, "max-plies", plies)
+
+            record = make_move(players[side].choose_move(board, moves))
+            plies += 1
+            if on_move is not None:
+                on_move(record)
+            if record.captured:
+                plies_without_capture = 0
+                occurrences.clear()
+            else:
+                plies_without_capture += 1
+                if plies_without_capture >= max_plies_without_capture:
+                    return PlayOutResult(None, "no-capture", plies)
+                if not record.was_king:
+                    occurrences.clear()
+
+            key = board.key
+            count = occurrences.get(key, 0) + 1
+            if count >= repetitions:
+                return PlayOutResult(None, "repetition", plies)
+            occurrences[key] = count
+
+    def unmake_move(self, record=None):
+        """
+        Takes back the last move made, restoring the moved piece (including
+        its king status) and every piece the move has captured. Only moves
+        made with undoable=True can be taken back.
+        :param record:
+            MoveRecord - the record returned by make_move. It must be the
+            last move made. If None, the move on top of the undo_stack is taken back.
+        :returns
+            MoveRecord - the record of the move that has been taken back
+        :raises: Exception if the record is not the last move made
+        """
+        if self.undo_stack == []:
+            raise Exception("There are no moves to take back")
+        if record is not None and record is not self.undo_stack[-1]:
+            raise Exception("Only the last move made can be taken back")
+        record = self.undo_stack.pop()
+        self.board.switch_side()
 
+        piece = record.piece
+        self.board.lift_piece(piece)
+        piece.position = record.initial_pos
+        piece.is_king = record.was_king
+        self.board.place_piece(piece)
 
+        for captured_piece in reversed(record.captured):
+            self.board.place_piece(captured_piece)
+            self.pieces_dict[captured_piece.player].append(captured_piece)
+        return record
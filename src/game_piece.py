@@ -1,4 +1,7 @@
 class GamePiece: 
+    # Lots of pieces are created in long games, so they do not get a __dict__
+    __slots__ = ("position", "player", "is_king", "board")
+
     def __init__(self, position, player):
         """
         Constructor
@@ -14,6 +17,8 @@ class GamePiece:
         self.position = position
         self.player = player
         self.is_king = False
+        # The board the piece is placed on (set by the Board itself)
+        self.board = None
 
     def __repr__(self):
         return f"{self.player}"
@@ -26,4 +31,8 @@ class GamePiece:
         :returns
             None
         """
-        self.is_king = True
\ No newline at end of file
+        if self.board is not None:
+            # The board has to update its masks of kings
+            self.board.crown_piece(self)
+        else:
+            self.is_king = True
\ No newline at end of file
@@ -0,0 +1,410 @@
+"""
+This is a file that contains a compact binary format for the records of games.
+
+A file of records starts with MAGIC, followed by the records of the games one
+after another. Every number is written as a varint (7 bits per byte, the
+lowest first, the high bit set on all the bytes but the last one), and every
+string as the varint of its length in bytes followed by its UTF-8 bytes.
+
+A record of a game is:
+- the header: rows_with_pieces, the width of the board and the names of the
+  two players, in the order of their seats;
+- the moves: the number of cells of the path of the move, the square of the
+  piece that moves and the squares of its path; a length of 0 ends the moves;
+- the result: the seat of the winner (or RESULT_DRAW, RESULT_UNKNOWN) and
+  the reason the game has ended (see PlayOutResult).
+
+The squares are the dark cells of the board (the only ones the pieces stand
+on) numbered from 0, row by row, so that a square of a board of up to 16 x 16
+takes a single byte. As the moves are written one by one and the length of
+a game is not needed up front, a game can be written while it is played.
+"""
+
+from functools import lru_cache
+
+import click
+
+from game import Game
+from player import Player
+
+MAGIC = b"CKR1"
+
+RESULT_DRAW = 2
+RESULT_UNKNOWN = 3
+
+# Number of bytes read from a file at a time
+CHUNK_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=None)
+def get_squares(number_of_rows, number_of_cols):
+    """
+    Returns the dark cells of a board, in the order of their numbers
+
+    Output:
+        tuple(list[tuple(int, int)], dict) - the positions of the squares, and
+        the numbers of the squares by their positions
+    """
+    positions = [(row, col) for row in range(number_of_rows)
+                 for col in range(number_of_cols) if (row + col) % 2 == 1]
+    return positions, {position: number for number, position in enumerate(positions)}
+
+
+def write_varint(file, value):
+    """
+    Writes a non-negative int as a varint
+    """
+    data = bytearray()
+    while value >= 0x80:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+    file.write(data)
+
+
+def write_string(file, value):
+    """
+    Writes a string as its length and its UTF-8 bytes
+    """
+    data = value.encode("utf-8")
+    write_varint(file, len(data))
+    file.write(data)
+
+
+class GameRecord:
+    """
+    This class stores the record of a game: the board, the players and the
+    moves, which are enough to replay the game.
+
+    Public attributes:
+    - rows_with_pieces: number of rows populated with the pieces of a player.
+    - width: width of the board.
+    - names: (str, str) the names of the players, in the order of their seats.
+    - moves: list of the moves, as (position of the piece, path of the move).
+    - winner: the seat of the player who has won, None for a draw or an
+              unknown result (see reason).
+    - reason: why the game has ended (see PlayOutResult), "" if the result
+              is unknown.
+    """
+
+    def __init__(self, rows_with_pieces, width, names, moves=None, winner=None, reason=""):
+        self.rows_with_pieces = rows_with_pieces
+        self.width = width
+        self.names = tuple(names)
+        self.moves = [] if moves is None else moves
+        self.winner = winner
+        self.reason = reason
+
+    @classmethod
+    def from_game(cls, game):
+        """
+        Creates an empty record of a game in its initial position
+        """
+        return cls(game.number_populated_rows, game.width,
+                   [player.name for player in game.players])
+
+    def add_move(self, move_record):
+        """
+        Adds a move made in the game to the record. It can be passed to
+        Game.play_out as on_move.
+
+        Input:
+            move_record (MoveRecord) - the record of the move
+        """
+        self.moves.append((move_record.initial_pos, list(move_record.move[1])))
+
+    def set_result(self, result, players):
+        """
+        Sets the result of the game
+
+        Input:
+            result (PlayOutResult) - how the game has ended, see Game.play_out
+            players (list) - the players of the game, in the order of their seats
+        """
+        self.winner = None if result.winner is None else players.index(result.winner)
+        self.reason = result.reason
+
+    def replay(self, players=None):
+        """
+        Replays the game, checking that every move is legal.
+
+        Input:
+            players (list[Player]) - the players of the game, new ones by default
+        Output:
+            generator of tuple(Game, MoveRecord) - the same game after every
+            move, and the record of the move
+        :raises: ValueError if a move of the record is not legal
+        """
+        if players is None:
+            players = [Player(self.names[0], "white"), Player(self.names[1], "black")]
+        game = Game(players, self.rows_with_pieces, self.width)
+        for number, (origin, path) in enumerate(self.moves):
+            player = players[game.board.side_to_move]
+            for move in game.get_possible_moves(player):
+                if move.piece.position == origin and list(move.path) == path:
+                    break
+            else:
+                raise ValueError(f"Move {number + 1} of the record is not legal")
+            yield game, game.make_move(move)
+
+    def get_move_text(self, number):
+        """
+        Returns a move in the notation of PDN, for example "9-14" or "14x21"
+
+        Input:
+            number (int) - the index of the move in the record
+        Output:
+            str - the move
+        """
+        _, numbers = get_squares(self.rows_with_pieces * 2 + 2, self.width)
+        origin, path = self.moves[number]
+        is_jump = len(path) > 1 or abs(path[0][0] - origin[0]) > 1
+        separator = "x" if is_jump else "-"
+        return separator.join(str(numbers[cell] + 1) for cell in [origin] + path)
+
+    def to_pdn(self, event="Checkers"):
+        """
+        Writes the game in Portable Draughts Notation. The first player is
+        written as White, and the squares are numbered from 1 as in PDN.
+
+        Input:
+            event (str) - the value of the Event tag
+        Output:
+            str - the game in PDN
+        """
+        if self.winner is None:
+            result = "1/2-1/2" if self.reason != "" else "*"
+        else:
+            result = "1-0" if self.winner == 0 else "0-1"
+
+        lines = [f'[Event "{event}"]',
+                 f'[White "{self.names[0]}"]',
+                 f'[Black "{self.names[1]}"]',
+                 f'[Result "{result}"]',
+                 f'[BoardSize "{self.rows_with_pieces * 2 + 2}x{self.width}"]',
+                 ""]
+        tokens = []
+        for number in range(len(self.moves)):
+            if number % 2 == 0:
+                tokens.append(f"{number // 2 + 1}.")
+            tokens.append(self.get_move_text(number))
+        tokens.append(result)
+
+        line = ""
+        for token in tokens:
+            if line and len(line) + len(token) + 1 > 79:
+                lines.append(line)
+                line = token
+            else:
+                line = f"{line} {token}" if line else token
+        lines.append(line)
+        return "\n".join(lines) + "\n"
+
+
+class GameRecordWriter:
+    """
+    This class writes the records of games to a binary file, one move at a
+    time, so that a game is written while it is played:
+
+        writer.start_game(game)
+        result = game.play_out(on_move=writer.write_move)
+        writer.end_game(result)
+
+    Whole records are written with write_record.
+    """
+
+    def __init__(self, file):
+        """
+        Input:
+            file - a binary file opened for writing. MAGIC is written if the
+                   file is empty, so records can be appended to a file.
+        """
+        self.file = file
+        self._squares = None
+        self._players = None
+        if file.tell() == 0:
+            file.write(MAGIC)
+
+    def start_game(self, game):
+        """
+        Writes the header of a game in its initial position
+        """
+        self._write_header(game.number_populated_rows, game.width,
+                           [player.name for player in game.players])
+        self._players = game.players
+
+    def write_move(self, move_record):
+        """
+        Writes a move made in the game. It can be passed to Game.play_out as on_move.
+
+        Input:
+            move_record (MoveRecord) - the record of the move
+        """
+        self._write_move(move_record.initial_pos, move_record.move[1])
+
+    def end_game(self, result=None):
+        """
+        Writes the end of the game
+
+        Input:
+            result (PlayOutResult) - how the game has ended, None if unknown
+        """
+        if result is None:
+            self._write_result(None, "")
+        else:
+            winner = None if result.winner is None else self._players.index(result.winner)
+            self._write_result(winner, result.reason)
+        self._players = None
+
+    def write_record(self, record):
+        """
+        Writes a whole record of a game
+        """
+        self._write_header(record.rows_with_pieces, record.width, record.names)
+        for origin, path in record.moves:
+            self._write_move(origin, path)
+        self._write_result(record.winner, record.reason)
+
+    def _write_header(self, rows_with_pieces, width, names):
+        file = self.file
+        write_varint(file, rows_with_pieces)
+        write_varint(file, width)
+        for name in names:
+            write_string(file, name)
+        self._squares = get_squares(rows_with_pieces * 2 + 2, width)[1]
+
+    def _write_move(self, origin, path):
+        squares = self._squares
+        write_varint(self.file, len(path))
+        for cell in [origin] + list(path):
+            write_varint(self.file, squares[tuple(cell)])
+
+    def _write_result(self, winner, reason):
+        write_varint(self.file, 0)
+        if winner is None:
+            winner = RESULT_DRAW if reason != "" else RESULT_UNKNOWN
+        write_varint(self.file, winner)
+        write_string(self.file, reason)
+        self._squares = None
+
+
+class _ChunkReader:
+    """
+    Reads the varints of a binary file through a buffer of CHUNK_SIZE bytes
+    """
+    __slots__ = ("file", "buffer", "pos")
+
+    def __init__(self, file):
+        self.file = file
+        self.buffer = b""
+        self.pos = 0
+
+    def _fill(self):
+        data = self.file.read(CHUNK_SIZE)
+        if not data:
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def at_end(self):
+        return self.pos >= len(self.buffer) and not self._fill()
+
+    def read_varint(self):
+        value = 0
+        shift = 0
+        while True:
+            if self.pos >= len(self.buffer) and not self._fill():
+                raise ValueError("The file of records ends in the middle of a game")
+            byte = self.buffer[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_bytes(self, length):
+        while len(self.buffer) - self.pos < length:
+            if not self._fill():
+                raise ValueError("The file of records ends in the middle of a game")
+        data = self.buffer[self.pos:self.pos + length]
+        self.pos += length
+        return data
+
+    def read_string(self):
+        return self.read_bytes(self.read_varint()).decode("utf-8")
+
+
+def read_games(file):
+    """
+    Reads the records of the games from a binary file lazily: only a chunk
+    of the file is kept in memory at a time.
+
+    Input:
+        file - a binary file opened for reading
+    Output:
+        generator of GameRecord - the records of the games in the file
+    :raises: ValueError if the file is not a file of records or is cut off
+    """
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("The file is not a file of game records")
+    reader = _ChunkReader(file)
+    while not reader.at_end():
+        rows_with_pieces = reader.read_varint()
+        width = reader.read_varint()
+        names = (reader.read_string(), reader.read_string())
+        positions = get_squares(rows_with_pieces * 2 + 2, width)[0]
+        moves = []
+        while True:
+            length = reader.read_varint()
+            if length == 0:
+                break
+            origin = positions[reader.read_varint()]
+            moves.append((origin, [positions[reader.read_varint()] for _ in range(length)]))
+        result = reader.read_varint()
+        reason = reader.read_string()
+        winner = result if result < RESULT_DRAW else None
+        yield GameRecord(rows_with_pieces, width, names, moves, winner, reason)
+
+
+@click.command(name="checkers-records")
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--pdn', 'pdn_path', default=None, type=click.Path(dir_okay=False, writable=True),
+              help="File to export the games to in PDN")
+def cmd(path, pdn_path):
+    """
+    This is the command line interface for the files of game records. It
+    prints the number of games, moves and results in the file, and exports
+    the games to PDN.
+
+    Input:
+        path (str) - the file of game records
+        pdn_path (str) - file to write the games to in PDN (None to not export them)
+    """
+    games = 0
+    moves = 0
+    results = {}
+    pdn = open(pdn_path, "w") if pdn_path is not None else None
+    try:
+        with open(path, "rb") as file:
+            for record in read_games(file):
+                games += 1
+                moves += len(record.moves)
+                if record.winner is not None:
+                    key = f"player {record.winner + 1} won ({record.reason})"
+                else:
+                    key = f"draw ({record.reason})" if record.reason else "unknown"
+                results[key] = results.get(key, 0) + 1
+                if pdn is not None:
+                    pdn.write(record.to_pdn(event=f"Game {games}") + "\n")
+    finally:
+        if pdn is not None:
+            pdn.close()
+
+    click.echo(f"{games} games, {moves} moves")
+    for result, count in sorted(results.items()):
+        click.echo(f"  {result}: {count}")
+
+
+if __name__ == "__main__":
+    cmd()
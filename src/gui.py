@@ -29,9 +29,13 @@ import click
 from player import Player
 from board import Board
 from game_piece import GamePiece
-from bot import CheckersBot, RandomBot
+from bot import CheckersBot, RandomBot, AlphaBetaBot
+from transposition_table import TranspositionTable
+from instrumentation import Profiler, default_targets
 from game import Game
 from tui import is_bot
+from legal_moves import LegalMoves
+from thinking import BotThinker, Ponderer
 
 WIDTH = 600
 HEIGHT = 600
@@ -44,6 +48,8 @@ BLUE = (0, 120, 224)
 YELLOW = (245, 245, 44)
 BROWN = (166, 75, 0)
 SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+# The event posted by the thread of a bot once it has chosen its move
+BOT_MOVE_EVENT = pygame.USEREVENT + 1
 
 
 def is_players_piece(surface, coordinates, player_color):
@@ -79,193 +85,311 @@ def get_position(coordinates, game):
     position = (row, column)
     return position
 
-def draw_board(game, surface, game_piece = None) -> None:
+class BoardRenderer:
+    """
+    Draws the board on a surface, redrawing only the cells that have changed.
+
+    The empty board is drawn once into a cached surface, and the pieces into
+    a sprite per colour and kind. When cells change, the areas they cover on
+    the surface are drawn again from the empty board, the highlights and the
+    sprites of the pieces around them (a piece may be wider than its cell),
+    and only these areas are updated on the display.
+    """
+
+    def __init__(self, game, surface):
+        self.game = game
+        self.surface = surface
+        self.nrows = game.board.number_of_rows
+        self.ncols = game.board.number_of_cols
+
+        # Compute the row height and column width
+        self.row_height = HEIGHT // self.nrows + 1
+        self.column_width = WIDTH // self.ncols + 1
+
+        # Draw the empty board
+        self.background = pygame.Surface(surface.get_size())
+        self.background.fill(WHITE)
+        for row in range(self.nrows):
+            for col in range(self.ncols):
+                if (row + col) % 2 == 0:
+                    pygame.draw.rect(self.background, color=BROWN, rect=self.get_rect((row, col)))
+
+        # Draw the pieces, by (colour of the player, is_king), around the
+        # center of a square sprite
+        radius = max(self.row_height // 2 - 8, 0)
+        self.sprite_offset = radius + 1
+        self.sprites = {}
+        for player_color, color in (("Red", RED), ("Black", BLACK)):
+            for is_king in (False, True):
+                sprite = pygame.Surface((2 * radius + 2, 2 * radius + 2), SRCALPHA)
+                center = (radius + 1, radius + 1)
+                pygame.draw.circle(sprite, color=color, center=center, radius=radius)
+                if is_king:
+                    pygame.draw.circle(sprite, color=GOLD, center=center, radius=radius - 16)
+                self.sprites[(player_color, is_king)] = sprite
+        # Number of cells around a cell that the sprite of its piece can reach
+        self.reach = (max(radius // self.row_height, 0) + 1,
+                      max(radius // self.column_width, 0) + 1)
+
+        # What is drawn on every cell: (sprite, highlight), None until drawn
+        self.drawn = [None] * (self.nrows * self.ncols)
+
+    def get_rect(self, position):
+        """
+        Returns the rectangle of the cell on the surface
+        """
+        row, col = position
+        return Rect(col * self.column_width, row * self.row_height,
+                    self.column_width, self.row_height)
+
+    def get_sprite_rect(self, position):
+        """
+        Returns the rectangle the sprite of a piece on the cell covers on the surface
+        """
+        row, col = position
+        size = 2 * self.sprite_offset
+        return Rect(col * self.column_width + self.column_width // 2 - self.sprite_offset,
+                    row * self.row_height + self.row_height // 2 - self.sprite_offset,
+                    size, size)
+
+    def draw(self, game_piece=None, legal_moves=None):
+        """
+        Draws the cells that have changed since they were last drawn, and
+        updates them on the display
+        """
+        board = self.game.board
+        highlights = {}
+        if game_piece is not None:
+            # Highlight game piece
+            highlights[game_piece.position] = YELLOW
+
+            # Highlight all valid moves (jumps in blue, as they are mandatory)
+            if legal_moves is None:
+                legal_moves = LegalMoves(self.game, game_piece.player)
+            color = BLUE if legal_moves.is_jump else GREEN
+            for position in legal_moves.get_destinations(game_piece.position):
+                highlights[position] = color
+
+        changed = []
+        for index, piece in enumerate(board.cells):
+            position = divmod(index, self.ncols)
+            sprite = None if piece is None else (piece.player.color, piece.is_king)
+            cell = (sprite, highlights.get(position))
+            if cell != self.drawn[index]:
+                self.drawn[index] = cell
+                changed.append(position)
+        if changed == []:
+            return
+
+        # The area of a changed cell is drawn again in the same order as the
+        # whole board: the empty board, the highlights, then the pieces
+        reach_rows, reach_cols = self.reach
+        dirty_rects = []
+        for row, col in changed:
+            area = self.get_rect((row, col)).union(self.get_sprite_rect((row, col)))
+            self.surface.set_clip(area)
+            self.surface.blit(self.background, area, area)
+            around = [(other_row, other_col)
+                      for other_row in range(max(row - reach_rows, 0),
+                                             min(row + reach_rows + 1, self.nrows))
+                      for other_col in range(max(col - reach_cols, 0),
+                                             min(col + reach_cols + 1, self.ncols))]
+            for position in around:
+                highlight = self.drawn[position[0] * self.ncols + position[1]][1]
+                if highlight is not None:
+                    pygame.draw.rect(self.surface, color=highlight, rect=self.get_rect(position))
+            for position in around:
+                sprite = self.drawn[position[0] * self.ncols + position[1]][0]
+                if sprite is not None:
+                    self.surface.blit(self.sprites[sprite], self.get_sprite_rect(position))
+            self.surface.set_clip(None)
+            dirty_rects.append(area)
+
+        pygame.display.update(dirty_rects)
+
+
+# The renderer of the board drawn last, see draw_board
+_renderer = None
+
+
+def draw_board(game, surface, game_piece = None, legal_moves = None) -> None:
     """ 
-    Draws the current state of the board in the window
+    Draws the current state of the board in the window. Only the cells that
+    have changed since the last call are drawn (see BoardRenderer).
     Args:
         surface: Pygame surface to draw the board on
         board: The board to draw
+        game_piece: The selected piece, whose moves are highlighted
+        legal_moves: The LegalMoves of the turn (found from the game if
+                     a piece is selected and they are not given)
     Returns: None
     """
-    background = WHITE
-    surface.fill(background)
+    global _renderer
+    if _renderer is None or _renderer.game is not game or _renderer.surface is not surface:
+        _renderer = BoardRenderer(game, surface)
+    _renderer.draw(game_piece, legal_moves)
 
-    nrows = len(game.board.grid)
-    ncols = len(game.board.grid[0])
-
-    grid = game.board.grid
-
-    
-    # Compute the row height and column width
-    row_height = HEIGHT // nrows + 1
-    column_width = WIDTH // ncols + 1
-
-    # Draw the board
-    board_squares = []
-    for row in range(nrows):
-        for col in range(ncols):
-            rect = (col * column_width, row * row_height, column_width, row_height)
-
-            if row % 2 != 0 and col % 2 == 1: 
-                pygame.draw.rect(surface, color=BROWN, rect = rect)
-                rect = Rect(rect)
-                board_squares.append(rect)
-
-            if row % 2 == 0 and col % 2 != 1: 
-                pygame.draw.rect(surface, color=BROWN, rect = rect)
-                rect = Rect(rect)
-                board_squares.append(rect)
-            
-    if game_piece is not None: 
-        # Highlight game piece
-        row, col = game_piece.position
-        rect = (col * column_width, row * row_height, column_width, row_height)
-        pygame.draw.rect(surface, color= YELLOW, rect = rect)
-
-        # Highlight all valid moves (prioritize jumps)
-        moves = game.get_possible_moves_for_piece(game_piece)
-        jumps = game.get_possible_jumps_for_piece(game_piece)
-
-        if jumps != []: 
-            jumps = list(move[1][-1] for move in jumps)
-            for jump in jumps:
-                    row, col = jump
-                    rect = (col * column_width, row * row_height, column_width, row_height)
-                    pygame.draw.rect(surface, color= BLUE, rect = rect)
-        else:
-            if moves != []:
-                moves = list(move[1][-1] for move in moves)
-                for move in moves:
-                    row, col = move
-                    rect = (col * column_width, row * row_height, column_width, row_height)
-                    pygame.draw.rect(surface, color= GREEN, rect = rect)
-        
-    # Draw the game pieces
-    for i, row in enumerate(grid):
-        for j, piece in enumerate(row):
-            if piece is not None:
-                if piece.player.color == "Red":
-                    color = RED
-                if piece.player.color == "Black":
-                    color = BLACK
-                center = (j * column_width + column_width // 2, i * row_height + row_height // 2)
-                radius = row_height // 2 - 8
-                if not piece.is_king:
-                    pygame.draw.circle(surface, color=color,
-                                    center=center, radius=radius)
-                if piece.is_king:
-                    pygame.draw.circle(surface, color=color,
-                                    center=center, radius=radius)
-                    color = GOLD
-                    radius = radius - 16
-                    pygame.draw.circle(surface, color=color,
-                                    center=center, radius=radius)
-                    
-    pygame.display.flip()
-
-def play_checkers(game):
+def play_checkers(game, fps=30, ponder=False):
     '''
-    Plays a game of Checkers on a Pygame window
+    Plays a game of Checkers on a Pygame window.
+    The window is redrawn at most fps times per second, and while a player
+    thinks the loop sleeps until the next event. Bots think in a background
+    thread (see BotThinker), with "thinking" shown in the title of the
+    window. Whether the game is over is only checked after a move.
+    With ponder, a bot thinks about its replies during the turn of a human
+    player (see Ponderer), and plays a reply it has found right away.
     Args:
-        board: The board to play on
-        players: A list of players (GUIPlayer objects)
+        game: The game to play
+        fps: The maximum number of frames per second
+        ponder: Whether the bots think during the turn of a human player
     Returns: None
     '''
     # Initialize Pygame
     pygame.init()
     pygame.display.set_caption("Checkers")
+    pygame.event.set_blocked([MOUSEWHEEL, KEYUP, TEXTINPUT])
     draw_board(game, SCREEN)
+    clock = pygame.time.Clock()
 
     # 
     current_player = game.players[0]
     next_player = game.players[1]
 
     selected = None
+    # The legal moves of the player to move, found once per turn
+    legal_moves = LegalMoves(game, current_player)
+    game_over = check_player_lost(game, current_player, legal_moves)
+    thinker = None
+    # The bot thinking during the turn of a human player, if any
+    ponderer = None
     # Game loop
-    while not check_player_lost(game, current_player):
-        events = pygame.event.get()
-
+    while not game_over:
+        if ponder and ponderer is None and not is_bot(current_player) and is_bot(next_player):
+            ponderer = Ponderer(next_player, game, current_player)
+        if is_bot(current_player) and thinker is None:
+            reply = None if ponderer is None else ponderer.get_reply(game, legal_moves)
+            ponderer = None
+            if reply is not None:
+                game.make_move(reply)
+                temp = current_player
+                current_player = next_player
+                next_player = temp
+                legal_moves = LegalMoves(game, current_player)
+                draw_board(game, SCREEN)
+                game_over = check_player_lost(game, current_player, legal_moves)
+                clock.tick(fps)
+                continue
+            thinker = BotThinker(current_player, game, legal_moves,
+                                 on_done=lambda: pygame.event.post(pygame.event.Event(BOT_MOVE_EVENT)))
+            pygame.display.set_caption(f"Checkers - {current_player.name} is thinking...")
+
+        # Sleeping until something happens
+        events = [pygame.event.wait()] + pygame.event.get()
+
+        moved = False
+        motion = None
         for event in events:
             if event.type == pygame.QUIT:
+                if thinker is not None:
+                    thinker.cancel()
+                if ponderer is not None:
+                    ponderer.stop()
                 pygame.quit()
                 sys.exit()
-        if not is_bot(current_player):
+            if event.type == pygame.VIDEOEXPOSE:
+                pygame.display.flip()
+            if is_bot(current_player) or moved:
+                continue
             if event.type == pygame.MOUSEMOTION:
-                    if is_players_piece(SCREEN, event.pos, current_player.color): 
-                        board_color = get_position(event.pos, game)
-                        for piece in game.pieces_dict[current_player]:
-                            if piece.position == board_color:
-                                selected = piece
-                                break
-
-                        draw_board(game, SCREEN, game_piece=selected)
-                        pygame.display.update()
-
+                # Only the last position of the mouse in a frame matters
+                motion = event
             if event.type == pygame.MOUSEBUTTONDOWN:
-                        should_be_jump = game.get_all_jumps(current_player) != []
-                        board_coor = get_position(event.pos,game)
-                        if is_piece_moved(game, selected, board_coor, should_be_jump):
-                            temp = current_player
-                            current_player = next_player
-                            next_player = temp
-                            draw_board(game, SCREEN)
-        else:
-            move = current_player.choose_move(game.board, game.get_possible_moves(current_player))
-            game.make_move(move)
+                board_coor = get_position(event.pos,game)
+                moved = is_piece_moved(game, selected, board_coor, legal_moves)
+                if moved and ponderer is not None:
+                    ponderer.stop()
+
+        if thinker is not None:
+            if thinker.is_done():
+                game.make_move(thinker.get_move())
+                thinker = None
+                pygame.display.set_caption("Checkers")
+                moved = True
+        elif not moved and motion is not None:
+            if is_players_piece(SCREEN, motion.pos, current_player.color): 
+                board_color = get_position(motion.pos, game)
+                if game.board.is_on_grid(board_color):
+                    piece = game.board.grid[board_color[0]][board_color[1]]
+                    if piece is not None and piece.player is current_player:
+                        selected = piece
+
+                draw_board(game, SCREEN, game_piece=selected, legal_moves=legal_moves)
+
+        if moved:
             temp = current_player
             current_player = next_player
             next_player = temp
+            selected = None
+            legal_moves = LegalMoves(game, current_player)
             draw_board(game, SCREEN)
+            game_over = check_player_lost(game, current_player, legal_moves)
+
+        clock.tick(fps)
    
     print(f"{next_player} WON!")
     pygame.quit()
 
-def is_piece_moved(game,piece_to_move, selected_final_position, should_be_jump):
+def is_piece_moved(game, piece_to_move, selected_final_position, legal_moves):
     """
-    Checks if the piece is moved or not
+    Checks if the piece is moved or not, and moves it if the move is legal
     Input:
         piece_to_move (GamePiece) - the piece to move
         selected_final_position (tuple) - the final position of the piece
+        legal_moves (LegalMoves) - the legal moves of the turn
     Output:
         True - if the piece is moved to a valid location
         False - if the piece is not moved to a valid location
     """
-    all_possible_moves = game.get_possible_jumps_for_piece(piece_to_move)
-    if all_possible_moves == []:
-        if should_be_jump:
-            return False
-        all_possible_moves = game.get_possible_moves_for_piece(piece_to_move)
-    final_positions = list(move[1][-1] for move in all_possible_moves)
-
-    i = -1
-    for index, final_position in enumerate(final_positions):
-        if final_position == selected_final_position:
-            i = index
-            break
-    if i == -1:
+    if piece_to_move is None:
+        return False
+    moves = legal_moves.get_moves(piece_to_move.position, selected_final_position)
+    if moves == []:
         return False
     
-    game.make_move(all_possible_moves[i])
+    game.make_move(moves[0])
     return True
 
-def check_player_lost(game, current_player):
+def check_player_lost(game, current_player, legal_moves=None):
     """
     Checks if the player lost the game or not
     Input:
         current_player (Player) - a player whose turn it is
+        legal_moves (LegalMoves) - the legal moves of the player in this
+                                   turn, if they have been found already
     Output:
         True - if the player has lost the game
         False - if the player has not lost the game
     """
-    valid_moves = game.get_possible_moves(current_player)
-    return valid_moves == []
+    if legal_moves is not None:
+        return len(legal_moves) == 0
+    return not game.has_any_move(current_player)
                     
 @click.command(name="checkers-tui")
-@click.option('--player-1-type', default="Player One")
-@click.option('--player-2-type', default="Player Two")
+@click.option('--player-1', '--player-1-type', 'player_1_type', default="Player One")
+@click.option('--player-2', '--player-2-type', 'player_2_type', default="Player Two")
 @click.option('--width', default=8)
 @click.option('--rows-with-pieces', default=2)
-def cmd(player_1_type, player_2_type, width, rows_with_pieces):
+@click.option('--search-time', default=100,
+              help="Milliseconds the search-bot may think about a move")
+@click.option('--tt-size', default=65536, type=click.IntRange(min=0),
+              help="Entries in the transposition table of the search-bot (0 to disable)")
+@click.option('--profile', default=None, type=click.Path(dir_okay=False, writable=True),
+              help="File to write the calls and times of the hot paths to, as JSON")
+@click.option('--ponder', is_flag=True, default=False,
+              help="Let the bots think during the turn of a human player")
+@click.option('--fps', default=30, type=click.IntRange(min=1),
+              help="Maximum number of frames (and moves of bots) per second")
+def cmd(player_1_type, player_2_type, width, rows_with_pieces, search_time, tt_size, profile, fps, ponder):
     """
     This is the command line interface for the Checkers TUI.
 
@@ -274,11 +398,21 @@ def cmd(player_1_type, player_2_type, width, rows_with_pieces):
         player_2_type (str) - type of player 2
         width (int) - width of the board
         rows_with_pieces (int) - number of rows with pieces
+        search_time (int) - milliseconds the search-bot may think about a move
+        tt_size (int) - number of entries in the transposition table of the search-bot
+        profile (str) - file to write the profile of the game to (None to not profile it)
+        fps (int) - maximum number of frames per second
+        ponder (bool) - whether the bots think during the turn of a human player
     """
+    if tt_size == 1:
+        raise click.BadParameter("the table needs at least 2 entries (or 0 to disable it)",
+                                 param_hint="--tt-size")
     if player_1_type == "random-bot":
         player_1 = RandomBot("random-bot-1","Red")
     elif player_1_type == "smart-bot":
         player_1 = CheckersBot("smart-bot-1","Red")
+    elif player_1_type == "search-bot":
+        player_1 = AlphaBetaBot("search-bot-1","Red", time_limit=search_time / 1000)
     else:
         player_1 = Player(player_1_type, "Red")
 
@@ -286,13 +420,29 @@ def cmd(player_1_type, player_2_type, width, rows_with_pieces):
         player_2 = RandomBot("random-bot-2","Black")
     elif player_2_type == "smart-bot":
         player_2 = CheckersBot("smart-bot-2","Black")
+    elif player_2_type == "search-bot":
+        player_2 = AlphaBetaBot("search-bot-2","Black", time_limit=search_time / 1000)
     else:
         player_2 = Player(player_2_type, "Black")
 
     players = [player_1, player_2]
     game = Game(players, rows_with_pieces, width)
-
-    play_checkers(game)
+    for player in players:
+        if type(player) is AlphaBetaBot:
+            player.game = game
+            if tt_size > 0:
+                player.transposition_table = TranspositionTable(tt_size)
+
+    profiler = None
+    if profile is not None:
+        profiler = Profiler()
+        profiler.enable(default_targets() + [(sys.modules[__name__], "draw_board")])
+    try:
+        play_checkers(game, fps, ponder)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump(profile)
 
 if __name__ == "__main__":
     cmd()
@@ -0,0 +1,123 @@
+"""
+This is a file that contains an opt-in profiler of the hot paths of a game.
+
+While the profiler is enabled, the functions it watches are replaced by
+wrappers that count their calls and the time spent in them. Disabling it puts
+the original functions back, so a game that is not profiled runs exactly the
+same code as before, at no cost.
+"""
+
+from time import perf_counter
+import functools
+import json
+
+from game import Game
+from board import Board
+from bot import CheckersBot, RandomBot, AlphaBetaBot
+
+
+def default_targets():
+    """
+    Returns the functions the profiler watches by default, as (owner, name of
+    the function): the move generator, the captures, the moves of the pieces
+    on the board and the choices of the bots
+    """
+    return [
+        (Game, "get_possible_moves"),
+        (Game, "get_all_jumps_moves"),
+        (Board, "move_piece"),
+        (RandomBot, "choose_move"),
+        (CheckersBot, "choose_move"),
+        (AlphaBetaBot, "choose_move"),
+    ]
+
+
+class Profiler:
+    """
+    This class counts the calls of functions and the time spent in them.
+
+    A function is watched by replacing it on its owner (a class or a module)
+    with a wrapper, so the calls made through the owner are counted, while
+    references to the function taken before it was replaced are not. The time
+    of a function includes the time of the watched functions it calls.
+
+    Public attributes:
+    - counters: dict of [calls, seconds] by the qualified name of every
+                watched function (for example "Game.get_possible_moves").
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self._originals = []
+
+    @property
+    def enabled(self):
+        return self._originals != []
+
+    def enable(self, targets=None):
+        """
+        Starts watching the functions
+
+        Input:
+            targets (list[tuple(object, str)]) - the owners and the names of
+                the functions to watch, default_targets() by default
+        """
+        if targets is None:
+            targets = default_targets()
+        for owner, name in targets:
+            self._wrap(owner, name)
+
+    def disable(self):
+        """
+        Stops watching the functions and puts the original ones back. The
+        counters are kept.
+        """
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+
+    def _wrap(self, owner, name):
+        """
+        Replaces a function of the owner with a wrapper that counts its calls
+        """
+        # A method inherited from a base class is not in the dict of the
+        # owner, and is watched on the class it is defined in instead
+        original = vars(owner).get(name)
+        if original is None:
+            raise ValueError(f"{owner!r} does not define {name}")
+        label = original.__qualname__
+        counter = self.counters.setdefault(label, [0, 0.0])
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                counter[0] += 1
+                counter[1] += perf_counter() - start
+
+        self._originals.append((owner, name, original))
+        setattr(owner, name, wrapper)
+
+    def report(self):
+        """
+        Returns the counters, by the name of every watched function: the
+        number of calls, the total seconds and the mean microseconds per call
+        """
+        return {
+            label: {
+                "calls": calls,
+                "total_seconds": seconds,
+                "mean_us": seconds / calls * 1e6 if calls else 0.0,
+            }
+            for label, (calls, seconds) in sorted(self.counters.items(),
+                                                  key=lambda item: -item[1][1])
+        }
+
+    def dump(self, path):
+        """
+        Writes the report as JSON to the file at the path
+        """
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
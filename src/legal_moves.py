@@ -0,0 +1,64 @@
+class LegalMoves:
+    """
+    The legal moves of the player to move, found once per turn.
+
+    The moves are indexed by the cell of the piece that moves (the origin)
+    and by (origin, destination), where the destination is the last cell of
+    the path, so that the front-ends check the input of a player and
+    highlight cells with dictionary lookups instead of asking Game again.
+    As jumps are mandatory, either all the moves are jumps or none of them is.
+
+    Public attributes:
+    - player: the player the moves are found for.
+    - moves: list of the legal moves (see Game.get_possible_moves).
+    - is_jump: whether the moves are jumps.
+    - key: the key of the board the moves were found for.
+    """
+    __slots__ = ("player", "moves", "is_jump", "key", "_by_origin", "_by_origin_destination")
+
+    def __init__(self, game, player):
+        self.player = player
+        self.moves = game.get_possible_moves(player)
+        self.is_jump = self.moves != [] and game.is_jump(self.moves[0])
+        self.key = game.board.key
+        self._by_origin = {}
+        self._by_origin_destination = {}
+        for move in self.moves:
+            origin = move.piece.position
+            self._by_origin.setdefault(origin, []).append(move)
+            self._by_origin_destination.setdefault((origin, move.path[-1]), []).append(move)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def is_current(self, game):
+        """
+        Checks if the moves are still the ones of the position of the game
+        """
+        return game.board.key == self.key
+
+    def get_origins(self):
+        """
+        Returns the cells of the pieces that can move, in the order of the moves
+        """
+        return list(self._by_origin)
+
+    def get_destinations(self, origin):
+        """
+        Returns the cells the piece on the origin can move to (empty list if
+        it cannot move)
+        """
+        return list(dict.fromkeys(move.path[-1] for move in self._by_origin.get(origin, [])))
+
+    def get_moves_from(self, origin):
+        """
+        Returns the moves of the piece on the origin (empty list if it cannot move)
+        """
+        return self._by_origin.get(origin, [])
+
+    def get_moves(self, origin, destination):
+        """
+        Returns the moves of the piece on the origin that end on the destination.
+        There may be more than one jump with different paths.
+        """
+        return self._by_origin_destination.get((origin, destination), [])
@@ -0,0 +1,50 @@
+class Move:
+    """
+    A move of a game piece: the piece and the path of the cells it lands on.
+
+    It is a small slotted object, as lots of moves are found while the game
+    is played (especially by the bots). For the code that treats moves as
+    (piece, path) pairs, a Move can be indexed like one (move[0] is the piece,
+    move[1] the path), unpacked, and compared with tuples and lists.
+
+    Public attributes:
+    - piece: the GamePiece that is moved.
+    - path: list[(int, int)] - the cells the piece lands on. A simple move
+            has a single cell, a jump has one cell for every piece jumped over.
+    """
+    __slots__ = ("piece", "path")
+
+    def __init__(self, piece, path):
+        self.piece = piece
+        self.path = path
+
+    def __getitem__(self, index):
+        if index == 0 or index == -2:
+            return self.piece
+        if index == 1 or index == -1:
+            return self.path
+        raise IndexError("Move index out of range")
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self):
+        yield self.piece
+        yield self.path
+
+    def __eq__(self, other):
+        if isinstance(other, (Move, tuple, list)):
+            if len(other) != 2:
+                return False
+            return self.piece is other[0] and self.path == other[1]
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash((id(self.piece), tuple(self.path)))
+
+    def __repr__(self):
+        return f"({self.piece!r}, {self.path!r})"
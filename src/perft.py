@@ -0,0 +1,195 @@
+"""
+This is a file that contains perft: a count of the positions reached by all
+the sequences of moves of a given length.
+
+The counts only depend on the rules, so they check the move generator of
+Game against known numbers, while the time they take measures its speed.
+"""
+
+from time import perf_counter
+
+import click
+
+from game import Game
+from player import Player
+from board import Board
+from game_piece import GamePiece
+from piece_set import PieceSet
+
+# Known counts from the initial position, by (rows_with_pieces, width). As
+# long as there are no kings, the counts of 8 x 8 are those of English draughts.
+REFERENCE_COUNTS = {
+    (3, 8): [7, 49, 302, 1469, 7361, 36768, 179740],
+    (2, 6): [5, 25, 106],
+    (3, 10): [9, 81, 658, 4265, 26875],
+}
+
+# The characters of a position string: the men and the kings of either player
+PIECE_CHARACTERS = {"w": (0, False), "W": (0, True), "b": (1, False), "B": (1, True)}
+
+
+def perft(game, depth):
+    """
+    Counts the positions reached after every sequence of moves of the given
+    length, starting with the player to move. A game that ends earlier
+    (the player to move has no moves) is not counted.
+
+    Input:
+        game (Game) - the game, it is left in the same position
+        depth (int) - the number of moves
+    Output:
+        int - the number of positions
+    """
+    if depth == 0:
+        return 1
+    player = game.players[game.board.side_to_move]
+    moves = game.get_possible_moves(player)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        game.make_move(move, undoable=True)
+        nodes += perft(game, depth - 1)
+        game.unmake_move()
+    return nodes
+
+
+def divide(game, depth):
+    """
+    Counts the positions of perft separately for every move of the player to
+    move, which shows the move whose count differs from the expected one.
+
+    Input:
+        game (Game) - the game, it is left in the same position
+        depth (int) - the number of moves, including the first one
+    Output:
+        list[tuple(Move, int)] - every first move and its number of positions
+    """
+    player = game.players[game.board.side_to_move]
+    counts = []
+    for move in game.get_possible_moves(player):
+        game.make_move(move, undoable=True)
+        counts.append((move, perft(game, depth - 1)))
+        game.unmake_move()
+    return counts
+
+
+def load_position(position, players=None):
+    """
+    Creates a game in the position given by a string. The string starts with
+    the number of the player to move (1 or 2) and a colon, followed by the
+    rows of the board separated by slashes. In a row, "." is an empty cell,
+    "w" and "W" are a man and a king of the first player, "b" and "B" of the
+    second one. For example "1:.w.w/..../b.b./...." is a board of 4 x 4.
+
+    Input:
+        position (str) - the position
+        players (list[Player]) - the two players, new ones by default
+    Output:
+        Game - the game in the position
+    """
+    if players is None:
+        players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    side, _, rows = position.partition(":")
+    if side not in ("1", "2") or rows == "":
+        raise ValueError("The position has to start with the player to move: '1:' or '2:'")
+    rows = rows.split("/")
+    width = len(rows[0])
+    if any(len(row) != width for row in rows):
+        raise ValueError("All the rows of the position have to be of the same length")
+
+    game = Game(players, 1, width)
+    game.board = Board(len(rows), width, players)
+    game.pieces_dict = {player: PieceSet() for player in players}
+    for row_num, row in enumerate(rows):
+        for col_num, character in enumerate(row):
+            if character == ".":
+                continue
+            if character not in PIECE_CHARACTERS:
+                raise ValueError(f"Unknown piece {character!r} in the position")
+            seat, is_king = PIECE_CHARACTERS[character]
+            piece = GamePiece((row_num, col_num), players[seat])
+            piece.is_king = is_king
+            game.board.place_piece(piece)
+            game.pieces_dict[players[seat]].add(piece)
+    if side == "2":
+        game.board.switch_side()
+    return game
+
+
+def dump_position(game):
+    """
+    Writes the position of a game as a string that load_position reads.
+
+    Input:
+        game (Game) - the game
+    Output:
+        str - the position
+    """
+    characters = {(seat, is_king): character
+                  for character, (seat, is_king) in PIECE_CHARACTERS.items()}
+    rows = []
+    for row in game.board.grid:
+        rows.append("".join("." if piece is None else
+                            characters[(game.players.index(piece.player), piece.is_king)]
+                            for piece in row))
+    return f"{game.board.side_to_move + 1}:" + "/".join(rows)
+
+
+@click.command(name="checkers-perft")
+@click.option('--depth', default=5, type=click.IntRange(min=0))
+@click.option('--width', default=8)
+@click.option('--rows-with-pieces', default=3)
+@click.option('--position', default=None,
+              help="Position to start from instead of the initial one (see load_position)")
+@click.option('--divide', 'show_divide', is_flag=True,
+              help="Print the number of positions for every first move")
+def cmd(depth, width, rows_with_pieces, position, show_divide):
+    """
+    This is the command line interface for perft. The counts from the initial
+    position are checked against REFERENCE_COUNTS where they are known, and
+    the command fails if any of them differs.
+
+    Input:
+        depth (int) - number of moves to count the positions after
+        width (int) - width of the board
+        rows_with_pieces (int) - number of rows with pieces
+        position (str) - position to start from (see load_position)
+        show_divide (bool) - whether to print the counts of every first move
+    """
+    if position is not None:
+        game = load_position(position)
+        reference = []
+    else:
+        game = Game([Player("Player 1", "white"), Player("Player 2", "black")],
+                    rows_with_pieces, width)
+        reference = REFERENCE_COUNTS.get((rows_with_pieces, width), [])
+
+    failed = False
+    for current_depth in range(1, depth + 1):
+        start = perf_counter()
+        if show_divide and current_depth == depth:
+            counts = divide(game, current_depth)
+            nodes = sum(count for _, count in counts)
+        else:
+            nodes = perft(game, current_depth)
+        elapsed = perf_counter() - start
+        speed = nodes / elapsed if elapsed > 0 else 0.0
+        check = ""
+        if current_depth <= len(reference):
+            expected = reference[current_depth - 1]
+            check = "  ok" if nodes == expected else f"  MISMATCH (expected {expected})"
+            failed = failed or nodes != expected
+        click.echo(f"perft({current_depth}) = {nodes}  {elapsed:.3f} s  "
+                   f"{speed:,.0f} nodes/s{check}")
+
+    if show_divide and depth > 0:
+        for move, count in counts:
+            path = " ".join(f"{row},{col}" for row, col in move[1])
+            click.echo(f"{move[0].position[0]},{move[0].position[1]} -> {path}: {count}")
+    if failed:
+        raise click.ClickException("the counts differ from the reference counts")
+
+
+if __name__ == "__main__":
+    cmd()
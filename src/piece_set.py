@@ -0,0 +1,58 @@
+class PieceSet:
+    """
+    The game pieces of a player, in the order they have been added.
+
+    It is used by Game.pieces_dict instead of a list: adding, removing and
+    checking a piece take O(1), as the pieces are kept as the keys of a dict,
+    while the pieces can still be iterated in a fixed order. For the code
+    written for lists, append is the same as add, and remove raises
+    ValueError for a piece that is not in the set.
+    """
+    __slots__ = ("_pieces",)
+
+    def __init__(self, pieces=()):
+        self._pieces = dict.fromkeys(pieces)
+
+    def add(self, piece):
+        """
+        Adds a piece to the set (nothing happens if it is in the set already)
+        """
+        self._pieces[piece] = None
+
+    append = add
+
+    def remove(self, piece):
+        """
+        Removes a piece from the set
+
+        :raises: ValueError if the piece is not in the set
+        """
+        try:
+            del self._pieces[piece]
+        except KeyError:
+            raise ValueError("The piece is not in the set") from None
+
+    def discard(self, piece):
+        """
+        Removes a piece from the set if it is in the set
+        """
+        self._pieces.pop(piece, None)
+
+    def __contains__(self, piece):
+        return piece in self._pieces
+
+    def __iter__(self):
+        return iter(self._pieces)
+
+    def __len__(self):
+        return len(self._pieces)
+
+    def __eq__(self, other):
+        if isinstance(other, PieceSet):
+            return list(self._pieces) == list(other._pieces)
+        if isinstance(other, list):
+            return list(self._pieces) == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"PieceSet({list(self._pieces)!r})"
@@ -1,5 +1,7 @@
 class Player:
-    
+    # Subclasses (such as the bots) may still add attributes of their own
+    __slots__ = ("name", "color")
+
     def __init__(self, name: str, color: str):
         """
         Creates a Player insrtance with a given name
@@ -0,0 +1,57 @@
+from analytics import (GameFeatures, Summary, analyze, get_game_features, iter_records,
+                       summarize_chunk)
+from game_record import GameRecord, GameRecordWriter
+from tournament import TournamentSettings, play_game
+
+
+def write_archive(path, number_of_games):
+    settings = TournamentSettings(("smart-bot", "random-bot"), rows_with_pieces=2,
+                                  max_plies=60, record=True)
+    with open(path, "wb") as file:
+        writer = GameRecordWriter(file)
+        for number in range(number_of_games):
+            writer.write_record(play_game((number, settings)).record)
+
+
+def test_features_of_a_game():
+    # 2 x 6 board: the first player captures a man on the third move
+    record = GameRecord(2, 6, ("a", "b"),
+                        [((1, 2), [(2, 3)]), ((4, 5), [(3, 4)]), ((2, 3), [(4, 5)])],
+                        winner=None, reason="max-plies")
+    features = get_game_features(record, opening_plies=2)
+    assert features.opening == "5-8 15-12"
+    assert features.plies == 3
+    assert (features.captures, features.capture_moves) == (1, 1)
+    assert features.first_king is None
+
+
+def test_parallel_summary_is_the_serial_one(tmp_path):
+    first, second = tmp_path / "first.ckr", tmp_path / "second.ckr"
+    write_archive(first, 6)
+    write_archive(second, 3)
+
+    records = list(iter_records([first, second]))
+    serial = summarize_chunk((records, 2))
+    parallel = analyze(iter_records([first, second]), processes=2, chunk_size=2)
+
+    assert parallel.games == serial.games == 9
+    assert sum(parallel.wins) + sum(parallel.draws.values()) == 9
+    assert parallel.plies == sum(len(record.moves) for record in records)
+    for name in ("wins", "draws", "plies", "max_plies", "captures", "capture_moves",
+                 "king_games", "first_king_plies", "openings"):
+        assert getattr(parallel, name) == getattr(serial, name)
+    assert sum(counts[0] for counts in parallel.openings.values()) == 9
+
+
+def test_only_the_most_frequent_openings_are_kept():
+    summary = Summary(max_openings=2)
+    other = Summary(max_openings=2)
+    for number in range(50):
+        opening = "9-13" if number % 5 == 0 else f"opening {number}"
+        summary.add(GameFeatures((3, 8), opening, 0, "no-moves", 10, 0, 0, None))
+        other.add(GameFeatures((3, 8), f"other {number}", 1, "no-moves", 10, 0, 0, None))
+        assert len(summary.openings) <= 4
+    summary.merge(other)
+    assert len(summary.openings) <= 4
+    assert summary.openings[((3, 8), "9-13")] == [10, 10, 0, 0]
+    assert summary.games == 100 and summary.wins == [50, 50]
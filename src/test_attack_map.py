@@ -0,0 +1,53 @@
+import pytest
+
+from attack_map import AttackMap
+from board import Board
+from game_piece import GamePiece
+from player import Player
+
+
+def make_board(pieces):
+    """
+    Places the pieces on an empty 10 x 10 board of two players, pieces is a
+    list of (seat of the player, position, whether the piece is a king)
+    """
+    players = [Player("a", "white"), Player("b", "black")]
+    board = Board(10, 10)
+    board.set_players(players)
+    for seat, position, is_king in pieces:
+        piece = GamePiece(position, players[seat])
+        piece.is_king = is_king
+        board.place_piece(piece)
+    return board, players
+
+
+def test_men_only_capture_forward():
+    # The men of the second player move up the board
+    board, players = make_board([(0, (4, 5), False), (1, (5, 6), False), (1, (3, 2), False)])
+    attack_map = AttackMap(board, players[0])
+    assert attack_map.is_attacked((4, 5))
+    # The man on (3, 2) can not jump backwards over (4, 3)
+    assert not attack_map.is_attacked((4, 3))
+    assert attack_map.get_hanging_pieces() == 1 << board.index((4, 5))
+
+
+def test_kings_capture_along_the_diagonal():
+    board, players = make_board([(0, (4, 5), False), (1, (8, 9), True)])
+    attack_map = AttackMap(board, players[0])
+    assert attack_map.is_attacked((4, 5))
+    # The cell behind the piece has to be empty
+    board, players = make_board([(0, (4, 5), False), (0, (3, 4), False), (1, (8, 9), True)])
+    assert not AttackMap(board, players[0]).is_attacked((4, 5))
+
+
+def test_safe_moves_take_the_cell_left_into_account():
+    board, players = make_board([(0, (4, 5), False), (1, (6, 3), False)])
+    attack_map = AttackMap(board, players[0])
+    # The man on (6, 3) lands on the cell the piece has left
+    assert not attack_map.is_safe_move((4, 5), (5, 4))
+    assert attack_map.is_safe_move((4, 5), (5, 6))
+
+
+def test_players_of_the_board_are_needed():
+    with pytest.raises(Exception):
+        AttackMap(Board(10, 10), Player("a", "white"))
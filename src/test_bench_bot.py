@@ -0,0 +1,22 @@
+from bench_bot import PHASES, build_corpus, run_benchmarks
+from perft import load_position
+
+
+def test_corpus_is_seeded_and_covers_every_phase():
+    corpus = build_corpus(sizes=[(2, 6)], games=2, positions_per_phase=2, seed=1)
+    assert corpus == build_corpus(sizes=[(2, 6)], games=2, positions_per_phase=2, seed=1)
+    assert {phase for _, phase, _ in corpus} == set(PHASES)
+    for size, _, position in corpus:
+        assert size == (2, 6)
+        assert load_position(position).board.number_of_cols == 6
+
+
+def test_benchmarks_report_every_function():
+    corpus = build_corpus(sizes=[(2, 6)], games=1, positions_per_phase=2, seed=1)
+    results = run_benchmarks(corpus, repeat=2)
+    names = {name for _, _, name in results}
+    assert {"CheckersBot.choose_move", "RandomBot.choose_move"} <= names
+    for result in results.values():
+        assert result["calls"] > 0
+        assert 0 <= result["median_us"] <= result["p99_us"]
+        assert result["peak_bytes"] >= 0
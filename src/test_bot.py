@@ -0,0 +1,108 @@
+import bot as bot_module
+from game import Game
+from board import Board
+from game_piece import GamePiece
+from bot import CheckersBot, RandomBot, AlphaBetaBot
+
+
+def test_checkers_aggressive_moves():
+    """asserts that only the distances to the enemy pieces make a move aggressive"""
+    player_1 = CheckersBot("Player 1", "white")
+    player_2 = RandomBot("Player 2", "black")
+    game = Game([player_1, player_2], 2, 8)
+    test_board = Board(10, 10)
+    game.board = test_board
+    piece_0 = GamePiece((2, 3), player_1)
+    piece_1 = GamePiece((2, 9), player_1)
+    piece_2 = GamePiece((8, 1), player_2)
+    for piece in (piece_0, piece_1, piece_2):
+        game.board.place_piece(piece)
+    moves = game.get_possible_moves(player_1)
+    assert player_1.aggressive_moves(moves, test_board) == [(piece_0, [(3, 2)])]
+
+
+def test_checkers_danger():
+    """asserts that the moves next to an enemy piece with an empty cell behind are unsafe"""
+    player_1 = CheckersBot("Player 1", "white")
+    player_2 = RandomBot("Player 2", "black")
+    game = Game([player_1, player_2], 2, 8)
+    test_board = Board(10, 10)
+    game.board = test_board
+    piece_0 = GamePiece((3, 4), player_1)
+    piece_1 = GamePiece((5, 6), player_2)
+    piece_2 = GamePiece((3, 8), player_1)
+    for piece in (piece_0, piece_1, piece_2):
+        game.board.place_piece(piece)
+    moves = game.get_possible_moves(player_1)
+    assert sorted(player_1.check_if_danger(moves, test_board), key=lambda move: move[1]) == \
+        [(piece_0, [(4, 3)]), (piece_2, [(4, 9)])]
+
+
+def test_alpha_beta_1():
+    """asserts that the search bot does not move a piece where it gets captured right away"""
+    player_1 = AlphaBetaBot("Player 1", "white", time_limit=0.5)
+    player_2 = RandomBot("Player 2", "black")
+    players = [player_1, player_2]
+    game = Game(players, 2, 8)
+    player_1.game = game
+    test_board = Board(8, 8)
+    game.board = test_board
+    piece_0 = GamePiece((2, 3), player_1)
+    piece_1 = GamePiece((0, 7), player_1)
+    piece_2 = GamePiece((4, 5), player_2)
+    game.pieces_dict[player_1] = [piece_0, piece_1]
+    game.pieces_dict[player_2] = [piece_2]
+    game.board.place_piece(piece_0)
+    game.board.place_piece(piece_1)
+    game.board.place_piece(piece_2)
+    chosen = player_1.choose_move(test_board, game.get_possible_moves(player_1))
+    assert not (chosen[0] == piece_0 and chosen[1] == [(3, 4)])
+    assert player_1.depth_reached >= 2
+
+
+def test_alpha_beta_2():
+    """asserts that the search bot returns a legal move and leaves the game as it was when the budget is tiny"""
+    player_1 = AlphaBetaBot("Player 1", "white", max_nodes=50)
+    player_2 = RandomBot("Player 2", "black")
+    players = [player_1, player_2]
+    game = Game(players, 3, 10)
+    player_1.game = game
+    key = game.board.key
+    possible_moves = game.get_possible_moves(player_1)
+    chosen = player_1.choose_move(game.board, possible_moves)
+    assert chosen in possible_moves
+    assert player_1.nodes <= 50
+    assert game.board.key == key
+    assert game.undo_stack == []
+
+
+
+def test_alpha_beta_3(monkeypatch):
+    """asserts that the search bot stops once its time limit is used up on a wide board"""
+    # The clock moves on by a millisecond every time the bot looks at it
+    clock = iter(range(10 ** 6))
+    monkeypatch.setattr(bot_module, "perf_counter", lambda: next(clock) / 1000)
+    player_1 = AlphaBetaBot("Player 1", "white", time_limit=0.1)
+    player_2 = RandomBot("Player 2", "black")
+    players = [player_1, player_2]
+    game = Game(players, 8, 20)
+    player_1.game = game
+    possible_moves = game.get_possible_moves(player_1)
+    chosen = player_1.choose_move(game.board, possible_moves)
+    assert chosen in possible_moves
+    # The deadline is about 90 looks at the clock away, one every CLOCK_INTERVAL nodes
+    assert 90 * AlphaBetaBot.CLOCK_INTERVAL <= player_1.nodes <= 91 * AlphaBetaBot.CLOCK_INTERVAL
+    assert game.undo_stack == []
+
+
+def test_alpha_beta_stays_stopped():
+    """asserts that a search bot that has been stopped does not search any more"""
+    player_1 = AlphaBetaBot("Player 1", "white", time_limit=60)
+    player_2 = RandomBot("Player 2", "black")
+    game = Game([player_1, player_2], 3, 8)
+    player_1.game = game
+    player_1.stop()
+    possible_moves = game.get_possible_moves(player_1)
+    assert player_1.choose_move(game.board, possible_moves) in possible_moves
+    assert player_1.depth_reached == 0
+    assert player_1.nodes == 1
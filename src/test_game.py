@@ -0,0 +1,475 @@
+import pytest
+
+from player import Player
+from game import Game
+from board import Board
+from game_piece import GamePiece
+from move import Move
+
+
+def make_empty_game(rows=8, cols=8):
+    player_1 = Player("Player 1", "white")
+    player_2 = Player("Player 2", "black")
+    game = Game([player_1, player_2], 2, cols)
+    game.board = Board(rows, cols)
+    game.pieces_dict[player_1] = []
+    game.pieces_dict[player_2] = []
+    return game, player_1, player_2
+
+
+def add_piece(game, position, player, is_king=False):
+    piece = GamePiece(position, player)
+    piece.is_king = is_king
+    game.board.place_piece(piece)
+    game.pieces_dict[player].append(piece)
+    return piece
+
+
+def test_grid_is_derived_from_masks():
+    game, player_1, player_2 = make_empty_game()
+    piece = add_piece(game, (2, 3), player_1)
+    board = game.board
+
+    assert board.grid[2][3] is piece
+    assert board.men[player_1] == 1 << board.index((2, 3))
+    assert not board.is_empty_cell((2, 3))
+    assert board.is_empty_cell((3, 4))
+    assert not board.is_empty_cell((8, 0))
+
+    board.move_piece((2, 3), (3, 4), game)
+    assert board.grid[2][3] is None
+    assert board.grid[3][4] is piece
+    assert board.occupied == 1 << board.index((3, 4))
+
+
+def test_shift_does_not_wrap_around_rows():
+    board = Board(4, 4)
+    last_col = 1 << board.index((1, 3))
+    assert board.shift(last_col, 1, 1) == 0
+    assert board.shift(last_col, 1, -1) == 1 << board.index((2, 2))
+    assert board.shift(1 << board.index((0, 0)), -1, 1) == 0
+
+
+def test_opening_moves_count():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 2, 8)
+    assert len(game.get_possible_moves(players[0])) == 7
+    assert len(game.get_possible_moves(players[1])) == 7
+
+
+def test_promotion_updates_king_mask():
+    game, player_1, player_2 = make_empty_game()
+    piece = add_piece(game, (6, 1), player_1)
+    game.make_move((piece, [(7, 2)]))
+
+    assert piece.is_king
+    assert game.board.kings[player_1] == 1 << game.board.index((7, 2))
+    assert game.board.men[player_1] == 0
+
+
+def test_king_jump_from_distance_removes_captured_piece():
+    game, player_1, player_2 = make_empty_game()
+    king = add_piece(game, (0, 1), player_1, is_king=True)
+    add_piece(game, (4, 5), player_2)
+
+    moves = game.get_possible_moves(player_1)
+    assert moves == [[king, [(5, 6)]]]
+
+    game.make_move(moves[0])
+    assert game.pieces_dict[player_2] == []
+    assert game.board.player_mask(player_2) == 0
+    assert game.board.grid[4][5] is None
+
+
+def snapshot(game):
+    board = game.board
+    pieces = {}
+    for player in game.players:
+        pieces[player] = (board.men.get(player, 0), board.kings.get(player, 0),
+                          sorted((piece.position, piece.is_king)
+                                 for piece in game.pieces_dict[player]))
+    return board.occupied, list(board.cells), pieces
+
+
+def test_unmake_move_restores_captures_and_promotion():
+    game, player_1, player_2 = make_empty_game()
+    piece = add_piece(game, (4, 1), player_1)
+    add_piece(game, (5, 2), player_2)
+    add_piece(game, (7, 4), player_2)
+    before = snapshot(game)
+
+    record = game.make_move(game.get_possible_moves(player_1)[0], undoable=True)
+    assert not piece.is_king
+    assert len(record.captured) == 1
+    assert game.undo_stack == [record]
+
+    game.make_move((game.pieces_dict[player_2][0], [(6, 5)]), undoable=True)
+    game.make_move((piece, [(7, 2)]), undoable=True)
+    assert piece.is_king
+
+    game.unmake_move()
+    game.unmake_move()
+    game.unmake_move(record)
+    assert snapshot(game) == before
+    assert game.undo_stack == []
+
+
+def test_unmake_move_walks_back_a_whole_game():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 3, 10)
+    before = snapshot(game)
+
+    turn = 0
+    moves = game.get_possible_moves(players[0])
+    while moves != [] and turn < 200:
+        game.make_move(moves[(turn * 7) % len(moves)], undoable=True)
+        turn += 1
+        moves = game.get_possible_moves(players[turn % 2])
+
+    while game.undo_stack != []:
+        game.unmake_move()
+    assert snapshot(game) == before
+
+
+def test_unmake_move_rejects_older_records():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 2)
+    first = game.make_move(game.get_possible_moves(players[0])[0], undoable=True)
+    game.make_move(game.get_possible_moves(players[1])[0], undoable=True)
+    with pytest.raises(Exception):
+        game.unmake_move(first)
+
+
+def test_position_key_is_kept_up_to_date():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 3, 10)
+    initial_key = game.board.key
+    keys = {initial_key}
+
+    turn = 0
+    moves = game.get_possible_moves(players[0])
+    while moves != [] and turn < 200:
+        game.make_move(moves[(turn * 5) % len(moves)], undoable=True)
+        assert game.board.key == game.board.compute_key()
+        keys.add(game.board.key)
+        turn += 1
+        moves = game.get_possible_moves(players[turn % 2])
+
+    assert len(keys) > turn // 2
+    while game.undo_stack != []:
+        game.unmake_move()
+        assert game.board.key == game.board.compute_key()
+    assert game.board.key == initial_key
+
+
+def test_position_key_does_not_depend_on_move_order():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 2, 8)
+    other_game = Game(players, 2, 8)
+    assert game.board.key == other_game.board.key
+
+    order = [((1, 0), (2, 1)), ((4, 1), (3, 0)), ((1, 2), (2, 3)), ((4, 7), (3, 6))]
+    other_order = order[2:] + order[:2]
+    for (start, end), (other_start, other_end) in zip(order, other_order):
+        game.make_move((game.board.grid[start[0]][start[1]], [end]))
+        other_game.make_move((other_game.board.grid[other_start[0]][other_start[1]],
+                              [other_end]))
+    assert game.board.key == other_game.board.key
+
+    game.make_move(game.get_possible_moves(players[0])[0])
+    assert game.board.key != other_game.board.key
+
+
+def found_moves(game, player):
+    moves = game.get_possible_moves(player)
+    by_piece = {}
+    for piece in game.pieces_dict[player]:
+        if game.get_all_jumps(player) == []:
+            by_piece[piece] = sorted(move[1] for move in game.get_possible_moves_for_piece(piece))
+        else:
+            by_piece[piece] = game.get_possible_jumps_for_piece(piece)
+    return moves, by_piece
+
+
+def test_cached_moves_match_moves_found_from_scratch():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 3, 10)
+
+    turn = 0
+    taken_back = set()
+    moves = game.get_possible_moves(players[0])
+    while moves != [] and turn < 150:
+        player = players[turn % 2]
+        cached = found_moves(game, player)
+        game.clear_move_cache()
+        assert found_moves(game, player) == cached
+        for piece, piece_moves in cached[1].items():
+            if game.get_all_jumps(player) != []:
+                assert piece_moves == [move for move in moves if move[0] is piece]
+
+        game.make_move(moves[(turn * 3) % len(moves)], undoable=True)
+        turn += 1
+        moves = game.get_possible_moves(players[turn % 2])
+        if turn % 10 == 0 and turn not in taken_back:
+            taken_back.add(turn)
+            game.unmake_move()
+            turn -= 1
+            moves = game.get_possible_moves(players[turn % 2])
+
+
+def test_cached_moves_follow_pieces_that_swap_places():
+    game, player_1, player_2 = make_empty_game()
+    first = add_piece(game, (3, 2), player_1, is_king=True)
+    second = add_piece(game, (3, 4), player_1, is_king=True)
+    add_piece(game, (7, 0), player_2)
+    moves = game.get_possible_moves(player_1)
+    assert (first, [(2, 1)]) in moves
+
+    # the kings swap their places, which gives the same position (and key)
+    game.board.lift_piece(first)
+    game.board.lift_piece(second)
+    first.position, second.position = (3, 4), (3, 2)
+    game.board.place_piece(first)
+    game.board.place_piece(second)
+
+    moves = game.get_possible_moves(player_1)
+    assert (second, [(2, 1)]) in moves
+    assert all(move[0].position == (3, 2) for move in moves if move[0] is second)
+    assert sorted(move[1] for move in game.get_possible_moves_for_piece(second)) == \
+        [[(2, 1)], [(2, 3)], [(4, 1)], [(4, 3)]]
+
+
+def test_cached_moves_are_copies():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 2)
+    moves = game.get_possible_moves(players[0])
+    moves.clear()
+    assert len(game.get_possible_moves(players[0])) == 7
+
+    game.make_move(game.get_possible_moves(players[0])[0], undoable=True)
+    game.unmake_move()
+    assert len(game.get_possible_moves(players[0])) == 7
+
+
+def test_jumps_do_not_depend_on_earlier_games():
+    game, player_1, player_2 = make_empty_game()
+    man = add_piece(game, (2, 3), player_1)
+    add_piece(game, (3, 4), player_2)
+    assert game.get_possible_moves(player_1) == [[man, [(4, 5)]]]
+
+    game, player_1, player_2 = make_empty_game()
+    king = add_piece(game, (1, 2), player_1, is_king=True)
+    add_piece(game, (3, 4), player_2)
+    assert game.get_possible_moves(player_1) == [[king, [(4, 5)]]]
+
+
+def test_moves_are_only_kept_when_undoable():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 2)
+    record = game.make_move(game.get_possible_moves(players[0])[0])
+    assert record.piece.position == record.move[1][-1]
+    assert game.undo_stack == []
+    with pytest.raises(Exception):
+        game.unmake_move()
+
+
+def test_position_key_does_not_depend_on_placing_order():
+    game, player_1, player_2 = make_empty_game()
+    add_piece(game, (2, 3), player_1)
+    add_piece(game, (5, 2), player_2)
+    other_game, _, _ = make_empty_game()
+    other_game.players = [player_1, player_2]
+    other_game.pieces_dict = {player_1: [], player_2: []}
+    add_piece(other_game, (5, 2), player_2)
+    add_piece(other_game, (2, 3), player_1)
+
+    game.get_possible_moves(player_1)
+    other_game.get_possible_moves(player_1)
+    assert game.board.key == other_game.board.key
+    assert Board(8, 8, [player_1, player_2]).key == 0
+
+
+def test_king_chains_do_not_block_each_other():
+    game, player_1, player_2 = make_empty_game()
+    king = add_piece(game, (1, 4), player_1, is_king=True)
+    for position in ((2, 5), (3, 2), (6, 3)):
+        add_piece(game, position, player_2)
+
+    # (6, 3) is captured by both chains, each chain keeps its own captures
+    assert game.get_all_jumps_moves(king.position, king) == [[(3, 6), (7, 2)], [(4, 1), (7, 4)]]
+    assert game.get_possible_moves(player_1) == [[king, [(3, 6), (7, 2)]],
+                                                 [king, [(4, 1), (7, 4)]]]
+
+
+def test_captured_pieces_are_not_jumped_twice():
+    game, player_1, player_2 = make_empty_game()
+    king = add_piece(game, (2, 1), player_1, is_king=True)
+    for position in ((3, 2), (3, 4), (5, 2), (5, 4)):
+        add_piece(game, position, player_2)
+
+    # from (4, 3) the piece on (3, 2) could be jumped back over, but it is captured already
+    paths = [[(4, 3), (6, 5)], [(4, 3), (6, 1)], [(4, 3), (2, 5)]]
+    assert game.get_all_jumps_moves(king.position, king) == paths
+    assert game.get_all_jumps_moves(king.position, king) == paths
+
+
+def test_iter_moves_matches_the_list_of_moves():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 3, 10)
+
+    turn = 0
+    while turn < 200:
+        player = players[turn % 2]
+        moves = list(game.iter_moves(player))
+        assert game.has_any_move(player) == (moves != [])
+        game.clear_move_cache()
+        assert moves == game.get_possible_moves(player)
+        assert list(game.iter_moves(player)) == moves
+        if moves == []:
+            break
+        game.make_move(moves[(turn * 7) % len(moves)])
+        turn += 1
+
+
+def test_iter_moves_yields_jumps_first_and_stops_early():
+    game, player_1, player_2 = make_empty_game()
+    man = add_piece(game, (2, 3), player_1)
+    add_piece(game, (0, 1), player_1)
+    enemy = add_piece(game, (3, 4), player_2)
+
+    moves = game.iter_moves(player_1)
+    assert next(moves) == [man, [(4, 5)]]
+    assert next(moves, None) is None
+    assert game.has_any_move(player_1)
+
+    game.board.remove_piece(enemy, game)
+    assert not game.has_any_move(player_2)
+    assert game.get_possible_moves(player_2) == []
+
+
+def test_moves_behave_like_pairs():
+    game, player_1, player_2 = make_empty_game()
+    man = add_piece(game, (2, 3), player_1)
+    move = game.get_possible_moves(player_1)[0]
+
+    assert isinstance(move, Move)
+    piece, path = move
+    assert (piece, path) == (move[0], move[1]) == (man, [(3, 4)])
+    assert move == (man, [(3, 4)]) and move == [man, [(3, 4)]]
+    assert move != (man, [(3, 2)]) and move != Move(GamePiece((2, 3), player_1), [(3, 4)])
+    assert len({move, Move(man, [(3, 4)])}) == 1
+    assert not hasattr(man, "__dict__") and not hasattr(player_1, "__dict__")
+
+
+def test_attack_map_finds_the_cells_pieces_are_captured_on():
+    game, player_1, player_2 = make_empty_game()
+    add_piece(game, (5, 4), player_2)
+    add_piece(game, (0, 7), player_2, is_king=True)
+    man = add_piece(game, (3, 2), player_1)
+    attack_map = game.get_attack_map(player_1)
+
+    # the man of player 2 jumps upwards only, the king along its diagonal
+    assert attack_map.is_attacked((4, 3)) and attack_map.is_attacked((4, 5))
+    assert not attack_map.is_attacked((6, 3))
+    assert attack_map.is_attacked((2, 5)) and attack_map.is_attacked((3, 4))
+    assert attack_map.get_hanging_pieces() == 0
+    assert game.get_attack_map(player_1) is attack_map
+
+    assert not attack_map.is_safe_move((3, 2), (4, 3))
+    assert attack_map.is_safe_move((3, 2), (4, 1))
+
+
+def test_attack_map_knows_the_cell_that_is_left():
+    game, player_1, player_2 = make_empty_game()
+    add_piece(game, (5, 4), player_2)
+    add_piece(game, (3, 2), player_1)
+    attack_map = game.get_attack_map(player_1)
+    # the man on (5, 4) lands on the cell the piece leaves
+    assert not attack_map.is_attacked((4, 3))
+    assert not attack_map.is_safe_move((3, 2), (4, 3))
+    assert attack_map.is_safe_move((3, 2), (4, 1))
+
+    game, player_1, player_2 = make_empty_game()
+    add_piece(game, (1, 0), player_2, is_king=True)
+    add_piece(game, (3, 2), player_1)
+    attack_map = game.get_attack_map(player_1)
+    # the piece cannot run away from the king along the diagonal: the king
+    # slides through the cell the piece leaves
+    assert attack_map.get_hanging_pieces() == 1 << game.board.index((3, 2))
+    assert not attack_map.is_safe_move((3, 2), (4, 3))
+    assert attack_map.is_safe_move((3, 2), (4, 1))
+
+
+class Shuffler:
+    """Moves a king back and forth between two cells"""
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    def choose_move(self, board, possible_moves):
+        for move in possible_moves:
+            if move[1][-1] in self.cells:
+                return move
+        return possible_moves[0]
+
+
+def make_kings_game():
+    game, player_1, player_2 = make_empty_game()
+    add_piece(game, (0, 1), player_1, is_king=True)
+    add_piece(game, (7, 6), player_2, is_king=True)
+    shufflers = [Shuffler({(0, 1), (1, 0)}), Shuffler({(7, 6), (6, 7)})]
+    return game, shufflers
+
+
+def test_play_out_detects_repetitions():
+    game, shufflers = make_kings_game()
+    result = game.play_out(shufflers)
+    # the starting position occurs again after 4 and 8 moves
+    assert (result.winner, result.reason, result.plies) == (None, "repetition", 8)
+
+
+def test_play_out_stops_without_captures():
+    game, shufflers = make_kings_game()
+    result = game.play_out(shufflers, max_plies_without_capture=6)
+    assert (result.reason, result.plies) == ("no-capture", 6)
+    result = game.play_out(shufflers, max_plies=3, repetitions=100)
+    assert (result.reason, result.plies) == ("max-plies", 3)
+
+
+def test_play_out_finds_the_winner():
+    game, player_1, player_2 = make_empty_game()
+    add_piece(game, (2, 3), player_1)
+    add_piece(game, (3, 4), player_2)
+    result = game.play_out([Shuffler(set()), Shuffler(set())])
+    assert (result.winner, result.reason, result.plies) == (player_1, "no-moves", 1)
+
+
+def test_game_is_copied_with_the_same_players():
+    players = [Player("a", "white"), Player("b", "black")]
+    game = Game(players, 2, 6)
+    copy = game.copy()
+    assert copy.players[0] is players[0]
+    assert copy.board.key == game.board.key
+    copy.make_move(copy.get_possible_moves(players[0])[0])
+    assert copy.board.key != game.board.key
+    assert len(game.get_possible_moves(players[0])) == 5
+
+
+def test_players_are_replaced_in_the_copy():
+    players = [Player("a", "white"), Player("b", "black")]
+    game = Game(players, 2, 6)
+    other = Player("a", "white")
+    copy = game.copy({players[0]: other})
+    assert copy.players == [other, players[1]]
+    assert copy.board.key == game.board.key
+    assert len(copy.get_possible_moves(other)) == 5
+    assert all(piece.player is other for piece in copy.pieces_dict[other])
+
+
+def test_pieces_off_the_board_have_no_moves():
+    game, player_1, player_2 = make_empty_game()
+    piece = add_piece(game, (3, 2), player_1)
+    assert game.get_possible_moves_for_piece(piece) != []
+    game.board.lift_piece(piece)
+    assert game.get_possible_moves_for_piece(piece) == []
+    assert game.get_possible_moves_for_piece(GamePiece((20, 20), player_1)) == []
@@ -0,0 +1,99 @@
+import io
+import random
+
+import pytest
+
+from bot import CheckersBot, RandomBot
+from game import Game
+from game_record import (MAGIC, GameRecord, GameRecordWriter, read_games,
+                         write_varint, _ChunkReader)
+
+
+def play_recorded_game(writer, seed, rows_with_pieces=2, width=6):
+    random.seed(seed)
+    players = [CheckersBot("Player 1", "white"), RandomBot("Player 2", "black")]
+    game = Game(players, rows_with_pieces, width)
+    record = GameRecord.from_game(game)
+
+    def on_move(move_record):
+        writer.write_move(move_record)
+        record.add_move(move_record)
+
+    writer.start_game(game)
+    result = game.play_out(max_plies=200, on_move=on_move)
+    writer.end_game(result)
+    record.set_result(result, players)
+    return game, record
+
+
+def test_varints_are_read_back():
+    file = io.BytesIO()
+    values = [0, 1, 127, 128, 300, 2 ** 40]
+    for value in values:
+        write_varint(file, value)
+    file.seek(0)
+    reader = _ChunkReader(file)
+    assert [reader.read_varint() for _ in values] == values
+    assert reader.at_end()
+
+
+def test_games_are_written_while_played_and_read_back():
+    file = io.BytesIO()
+    writer = GameRecordWriter(file)
+    played = [play_recorded_game(writer, seed) for seed in range(3)]
+    played.append(play_recorded_game(writer, 3, rows_with_pieces=3, width=10))
+    assert file.getvalue().startswith(MAGIC)
+
+    file.seek(0)
+    records = list(read_games(file))
+    assert len(records) == len(played)
+    for record, (game, expected) in zip(records, played):
+        assert (record.rows_with_pieces, record.width) == (expected.rows_with_pieces,
+                                                           expected.width)
+        assert record.names == ("Player 1", "Player 2")
+        assert record.moves == expected.moves
+        assert (record.winner, record.reason) == (expected.winner, expected.reason)
+
+        # the replay ends in the same position as the game
+        for replayed, _ in record.replay():
+            pass
+        assert replayed.board.key == game.board.key
+
+    # a move takes a couple of bytes
+    moves = sum(len(record.moves) for record in records)
+    assert len(file.getvalue()) < 4 * moves + 40 * len(records)
+
+
+def test_records_are_appended_and_copied():
+    file = io.BytesIO()
+    _, record = play_recorded_game(GameRecordWriter(io.BytesIO()), 0)
+    GameRecordWriter(file).write_record(record)
+    GameRecordWriter(file).write_record(record)
+    assert file.getvalue().count(MAGIC) == 1
+    file.seek(0)
+    assert [len(read.moves) for read in read_games(file)] == [len(record.moves)] * 2
+
+
+def test_bad_files_are_rejected():
+    with pytest.raises(ValueError):
+        list(read_games(io.BytesIO(b"not a record")))
+
+    file = io.BytesIO()
+    writer = GameRecordWriter(file)
+    play_recorded_game(writer, 0)
+    with pytest.raises(ValueError):
+        list(read_games(io.BytesIO(file.getvalue()[:-3])))
+
+    record = GameRecord(2, 6, ("a", "b"), [((1, 0), [(2, 1)]), ((1, 0), [(2, 1)])])
+    with pytest.raises(ValueError):
+        list(record.replay())
+
+
+def test_pdn_export():
+    record = GameRecord(3, 8, ("Walter", "Jesse"),
+                        [((2, 1), [(3, 2)]), ((5, 0), [(4, 1)]), ((3, 2), [(5, 0)])],
+                        winner=0, reason="no-moves")
+    pdn = record.to_pdn()
+    assert '[White "Walter"]' in pdn
+    assert '[Result "1-0"]' in pdn
+    assert pdn.rstrip().endswith("1. 9-14 21-17 2. 14x21 1-0")
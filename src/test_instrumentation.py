@@ -0,0 +1,45 @@
+import json
+import random
+
+from bot import CheckersBot
+from game import Game
+from board import Board
+from instrumentation import Profiler
+
+
+def test_profiler_counts_the_hot_paths(tmp_path):
+    random.seed(0)
+    players = [CheckersBot("Player 1", "white"), CheckersBot("Player 2", "black")]
+    game = Game(players, 2, 6)
+    profiler = Profiler()
+    profiler.enable()
+    try:
+        result = game.play_out(max_plies=40)
+    finally:
+        profiler.disable()
+
+    report = profiler.report()
+    assert report["CheckersBot.choose_move"]["calls"] == result.plies
+    assert report["Board.move_piece"]["calls"] == result.plies
+    assert report["Game.get_possible_moves"]["calls"] >= result.plies
+    assert report["Game.get_possible_moves"]["total_seconds"] > 0
+
+    path = tmp_path / "profile.json"
+    profiler.dump(path)
+    assert json.loads(path.read_text()) == report
+
+
+def test_disabled_profiler_leaves_the_original_functions():
+    original = Game.get_possible_moves, Board.move_piece
+    profiler = Profiler()
+    profiler.enable()
+    assert profiler.enabled
+    assert Game.get_possible_moves is not original[0]
+    profiler.disable()
+    assert not profiler.enabled
+    assert (Game.get_possible_moves, Board.move_piece) == original
+
+    # the calls made while the profiler is disabled are not counted
+    players = [CheckersBot("Player 1", "white"), CheckersBot("Player 2", "black")]
+    Game(players, 2, 6).get_possible_moves(players[0])
+    assert profiler.report()["Game.get_possible_moves"]["calls"] == 0
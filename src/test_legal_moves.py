@@ -0,0 +1,32 @@
+from player import Player
+from game import Game
+from legal_moves import LegalMoves
+from perft import load_position
+
+
+def test_moves_are_indexed_by_origin_and_destination():
+    players = [Player("a", "white"), Player("b", "black")]
+    game = Game(players, 2, 6)
+    legal_moves = LegalMoves(game, players[0])
+
+    assert len(legal_moves) == len(game.get_possible_moves(players[0]))
+    assert not legal_moves.is_jump
+    assert legal_moves.get_origins() == [(1, 0), (1, 2), (1, 4)]
+    assert sorted(legal_moves.get_destinations((1, 2))) == [(2, 1), (2, 3)]
+    assert legal_moves.get_destinations((0, 1)) == []
+    move = legal_moves.get_moves((1, 2), (2, 3))[0]
+    assert (move.piece.position, move.path) == ((1, 2), [(2, 3)])
+    assert legal_moves.get_moves((1, 2), (3, 4)) == []
+
+    assert legal_moves.is_current(game)
+    game.make_move(move)
+    assert not legal_moves.is_current(game)
+
+
+def test_only_jumps_are_legal_when_there_is_one():
+    game = load_position("1:....../.w...w/..b.../....../....../b.....")
+    legal_moves = LegalMoves(game, game.players[0])
+    assert legal_moves.is_jump
+    assert legal_moves.get_origins() == [(1, 1)]
+    assert legal_moves.get_moves_from((1, 5)) == []
+    assert legal_moves.get_destinations((1, 1)) == [(3, 3)]
@@ -0,0 +1,53 @@
+import pytest
+
+from game import Game
+from player import Player
+from perft import perft, divide, load_position, dump_position
+
+
+def make_game(rows_with_pieces, width):
+    return Game([Player("Player 1", "white"), Player("Player 2", "black")],
+                rows_with_pieces, width)
+
+
+@pytest.mark.parametrize("rows_with_pieces, width, counts", [
+    # as long as there are no kings, the counts of 8 x 8 are those of English draughts
+    (3, 8, [7, 49, 302, 1469, 7361, 36768]),
+    (2, 6, [5, 25, 106]),
+    (3, 10, [9, 81, 658, 4265]),
+])
+def test_perft_from_the_initial_position(rows_with_pieces, width, counts):
+    game = make_game(rows_with_pieces, width)
+    key = game.board.key
+    assert [perft(game, depth) for depth in range(1, len(counts) + 1)] == counts
+    assert game.board.key == key and game.undo_stack == []
+
+
+def test_perft_from_a_position_with_kings():
+    game = load_position("1:.w.w.w.w/......../...b..../......../"
+                         ".W....../......../b.b.B.../........")
+    assert [perft(game, depth) for depth in range(1, 6)] == [1, 7, 49, 280, 2280]
+
+
+def test_divide_adds_up_to_perft():
+    game = load_position("2:......../..w.w.../...b..../......../"
+                         "......../......../........")
+    counts = divide(game, 3)
+    assert sorted(move[1] for move, _ in counts) == [[(0, 1)], [(0, 5)]]
+    assert sum(count for _, count in counts) == perft(game, 3) == 6
+
+
+def test_load_position_rejects_bad_strings():
+    with pytest.raises(ValueError):
+        load_position(".w/b.")
+    with pytest.raises(ValueError):
+        load_position("1:.w/b..")
+    with pytest.raises(ValueError):
+        load_position("1:.x/b.")
+
+
+def test_positions_are_dumped_as_they_are_loaded():
+    position = "2:.w.w/..W./b.B./...."
+    assert dump_position(load_position(position)) == position
+    game = make_game(2, 6)
+    assert load_position(dump_position(game)).board.key == game.board.key
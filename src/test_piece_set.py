@@ -0,0 +1,44 @@
+import pytest
+
+from piece_set import PieceSet
+from player import Player
+from game import Game
+
+
+def test_pieces_are_kept_in_order():
+    pieces = PieceSet(["a", "b"])
+    pieces.append("c")
+    pieces.add("a")
+    assert list(pieces) == ["a", "b", "c"]
+    assert pieces == ["a", "b", "c"] and len(pieces) == 3
+
+    pieces.remove("b")
+    assert "b" not in pieces and "c" in pieces
+    with pytest.raises(ValueError):
+        pieces.remove("b")
+    pieces.discard("b")
+    assert pieces == PieceSet(["a", "c"])
+
+
+def test_captures_keep_pieces_and_counts_in_sync():
+    players = [Player("Player 1", "white"), Player("Player 2", "black")]
+    game = Game(players, 3, 10)
+    board = game.board
+
+    turn = 0
+    moves = game.get_possible_moves(players[0])
+    while moves != [] and turn < 200:
+        game.make_move(moves[(turn * 7) % len(moves)], undoable=True)
+        turn += 1
+        for player in players:
+            men = sum(1 for piece in game.pieces_dict[player] if not piece.is_king)
+            kings = len(game.pieces_dict[player]) - men
+            assert board.count_pieces(player) == (men, kings)
+            assert all(board.cells[board.index(piece.position)] is piece
+                       for piece in game.pieces_dict[player])
+        moves = game.get_possible_moves(players[turn % 2])
+
+    while game.undo_stack != []:
+        game.unmake_move()
+    assert board.count_pieces(players[0]) == (15, 0)
+    assert len(game.pieces_dict[players[1]]) == 15
@@ -0,0 +1,94 @@
+import threading
+import time
+
+from bot import AlphaBetaBot, CheckersBot
+from player import Player
+from game import Game
+from legal_moves import LegalMoves
+from thinking import BotThinker, Ponderer
+
+
+def test_bot_thinks_in_the_background_on_a_copy():
+    bot = AlphaBetaBot("search", "white", time_limit=0.05)
+    game = Game([bot, Player("b", "black")], 2, 6)
+    bot.game = game
+    key = game.board.key
+    legal_moves = LegalMoves(game, bot)
+    woken = threading.Event()
+
+    thinker = BotThinker(bot, game, legal_moves, on_done=woken.set)
+    move = thinker.get_move(timeout=5)
+    assert woken.wait(1)
+    assert thinker.is_done()
+    assert move in legal_moves.moves
+    assert game.board.key == key
+    # A copy of the bot has thought
+    assert bot.game is game and bot.nodes == 0
+
+
+def test_thinking_is_cancelled():
+    bot = AlphaBetaBot("search", "white", time_limit=60)
+    game = Game([bot, Player("b", "black")], 3, 8)
+    bot.game = game
+    called = []
+    thinker = BotThinker(bot, game, LegalMoves(game, bot), on_done=lambda: called.append(1))
+    time.sleep(0.1)
+    start = time.perf_counter()
+    thinker.cancel()
+    assert time.perf_counter() - start < bot.time_limit / 2
+    assert thinker.is_done()
+    assert called == []
+
+    # The bot itself is not stopped
+    bot.time_limit = 0.05
+    bot.choose_move(game.board, game.get_possible_moves(bot))
+    assert bot.depth_reached >= 1
+
+
+def test_bots_without_a_game_think_too():
+    bot = CheckersBot("smart", "white")
+    game = Game([bot, Player("b", "black")], 2, 6)
+    legal_moves = LegalMoves(game, bot)
+    assert BotThinker(bot, game, legal_moves).get_move(timeout=5) in legal_moves.moves
+
+
+def test_bot_ponders_its_replies():
+    human = Player("a", "white")
+    bot = AlphaBetaBot("search", "black", time_limit=0.02)
+    game = Game([human, bot], 2, 6)
+    bot.game = game
+    key = game.board.key
+
+    ponderer = Ponderer(bot, game, human)
+    assert ponderer.wait(timeout=10)
+    assert game.board.key == key
+    assert bot.game is game and bot.nodes == 0
+    assert len(ponderer.replies) == len(game.get_possible_moves(human))
+
+    game.make_move(game.get_possible_moves(human)[-1])
+    legal_moves = LegalMoves(game, bot)
+    assert ponderer.get_reply(game, legal_moves) in legal_moves.moves
+
+
+def test_pondering_is_stopped():
+    human = Player("a", "white")
+    bot = AlphaBetaBot("search", "black", time_limit=60)
+    game = Game([human, bot], 3, 8)
+    bot.game = game
+    ponderer = Ponderer(bot, game, human)
+    time.sleep(0.1)
+    start = time.perf_counter()
+    ponderer.stop()
+    assert time.perf_counter() - start < bot.time_limit / 2
+    assert ponderer.is_done()
+    assert ponderer.replies == {}
+
+    # Also when it is stopped before a search starts
+    start = time.perf_counter()
+    for _ in range(5):
+        Ponderer(bot, game, human).stop()
+    assert time.perf_counter() - start < bot.time_limit / 2
+    assert bot.game is game
+    # No reply is known for a position the bot has not thought about
+    game.make_move(game.get_possible_moves(human)[0])
+    assert ponderer.get_reply(game, LegalMoves(game, bot)) is None
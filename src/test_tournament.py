@@ -0,0 +1,39 @@
+import io
+
+from tournament import TournamentSettings, play_game, run_tournament
+from game_record import GameRecordWriter, read_games
+
+
+def test_games_are_independent_and_seeded():
+    settings = TournamentSettings(("smart-bot", "random-bot"), rows_with_pieces=2, seed=3)
+    first = play_game((5, settings))
+    again = play_game((5, settings))
+    assert (first.winner, first.plies) == (again.winner, again.plies)
+    assert len(first.move_times[0]) + len(first.move_times[1]) == first.plies
+
+    # a game is not changed by the games played before it in the same process
+    play_game((6, settings))
+    assert play_game((5, settings)).plies == first.plies
+
+
+def test_tournament_counts_every_game():
+    settings = TournamentSettings(("random-bot", "random-bot"), rows_with_pieces=2,
+                                  max_plies=30)
+    summary = run_tournament(settings, 6, processes=2)
+    assert sum(summary["wins"]) + summary["draws"] == 6
+    assert 0 < summary["average_plies"] <= 30
+    assert summary["move_times"][0]["median"] <= summary["move_times"][0]["max"]
+
+
+def test_tournament_records_every_game():
+    settings = TournamentSettings(("smart-bot", "random-bot"), rows_with_pieces=2,
+                                  max_plies=30, record=True)
+    file = io.BytesIO()
+    summary = run_tournament(settings, 4, processes=2, writer=GameRecordWriter(file))
+    file.seek(0)
+    records = list(read_games(file))
+    assert len(records) == 4
+    assert sum(len(record.moves) for record in records) == 4 * summary["average_plies"]
+    for record in records:
+        for _ in record.replay():
+            pass
@@ -0,0 +1,67 @@
+import pytest
+
+from transposition_table import TranspositionTable, EXACT, LOWER_BOUND
+from game import Game
+from bot import AlphaBetaBot, RandomBot
+
+
+def test_size_is_rounded_down_to_power_of_two():
+    assert TranspositionTable(100).size == 64
+    with pytest.raises(ValueError):
+        TranspositionTable(1)
+
+
+def test_probe_counts_hits_misses_and_collisions():
+    table = TranspositionTable(4)
+    assert table.probe(5) is None
+    table.store(5, 3, EXACT, 10, "move")
+    assert table.probe(5) == (5, 3, EXACT, 10, "move")
+    # 7 lands in the same bucket as 5 but is a different position
+    assert table.probe(7) is None
+    assert (table.hits, table.misses, table.collisions) == (1, 2, 1)
+
+
+def test_deep_results_are_preferred_and_memory_stays_capped():
+    table = TranspositionTable(4)
+    table.store(1, 8, EXACT, 1, None)
+    for key in range(3, 1001, 2):
+        table.store(key, 1, LOWER_BOUND, key, None)
+
+    # the deep result survives all the shallow ones stored in its bucket
+    assert table.probe(1) == (1, 8, EXACT, 1, None)
+    assert table.probe(999) == (999, 1, LOWER_BOUND, 999, None)
+    assert table.get_stats()["used"] <= table.size
+
+    table.store(1001, 9, EXACT, 0, None)
+    assert table.probe(1001) is not None
+    assert table.probe(1) is not None
+
+
+def test_old_deep_entries_are_replaced_after_new_search():
+    table = TranspositionTable(4)
+    table.store(1, 8, EXACT, 1, None)
+    table.store(3, 1, EXACT, 3, None)
+    assert table.probe(1) is not None
+
+    table.new_search()
+    table.store(5, 1, EXACT, 5, None)
+    table.store(7, 1, EXACT, 7, None)
+    assert table.probe(1) is None
+    assert table.probe(5) is not None
+    assert table.probe(7) is not None
+
+
+def test_search_bot_uses_the_table():
+    player_1 = AlphaBetaBot("Player 1", "white", max_nodes=3000,
+                            transposition_table=TranspositionTable(1024))
+    player_2 = RandomBot("Player 2", "black")
+    game = Game([player_1, player_2], 2, 8)
+    player_1.game = game
+    key = game.board.key
+
+    possible_moves = game.get_possible_moves(player_1)
+    chosen = player_1.choose_move(game.board, possible_moves)
+    assert chosen in possible_moves
+    assert game.board.key == key
+    assert game.undo_stack == []
+    assert player_1.transposition_table.hits > 0
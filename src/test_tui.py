@@ -1,10 +1,15 @@
+import io
+
 import pytest
 from unittest.mock import Mock
+from rich.console import Console
+from rich.text import Text
 
 from player import Player
 from game import Game
-from bot import CheckersBot, RandomBot
-from tui import TUIGame, is_bot
+from bot import CheckersBot, RandomBot, AlphaBetaBot
+from tui import TUI, TUIGame, is_bot
+from legal_moves import LegalMoves
 
 
 
@@ -16,6 +21,10 @@ def test_should_say_is_bot_when_player_is_checkers_bot():
     simple_bot = CheckersBot("checkers_bot_name", "color")
     assert is_bot(simple_bot)
 
+def test_should_say_is_bot_when_player_is_alpha_beta_bot():
+    search_bot = AlphaBetaBot("search_bot_name", "color")
+    assert is_bot(search_bot)
+
 def test_should_say_is_not_bot_when_player_is_real_player():
     player = Player("name", "color")
     assert not is_bot(player)
@@ -39,3 +48,70 @@ def test_is_draw():
     # Case 2 - Both players do not agree for a draw
     mock_tui.get_bool_input.return_value = False
     assert not test_TUIGame.is_draw(player_1, player_2)
+
+
+class CountingFile(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+
+def make_tui(is_terminal=True):
+    tui = TUI()
+    tui.console = Console(file=CountingFile(), force_terminal=is_terminal, width=120)
+    return tui
+
+
+def test_board_is_printed_in_a_single_write():
+    game = Game([Player("a", "#5442f5"), Player("b", "#42f2f5")], 2, 10)
+    tui = make_tui()
+    tui.print_board(game, highlights=[(1, 0)])
+    assert tui.console.file.writes == 1
+
+    lines = Text.from_ansi(tui.console.file.getvalue()).plain.splitlines()
+    assert len(lines) == 2 + 2 * game.board.number_of_rows
+    assert lines[2] == " 1|  | O|  | O|  | O|  | O|  | O|"
+
+
+def test_only_the_changed_cells_are_redrawn():
+    players = [Player("a", "#5442f5"), Player("b", "#42f2f5")]
+    game = Game(players, 2, 8)
+    tui = make_tui()
+    tui.print_board(game)
+    full_length = len(tui.console.file.getvalue())
+
+    game.make_move(game.get_possible_moves(players[0])[0])
+    tui.print_board(game, only_changes=True)
+    update = tui.console.file.getvalue()[full_length:]
+    assert tui.console.file.writes == 2
+    # the two cells of the move, each with the cursor moved there and back
+    assert 0 < len(update) < full_length // 4
+    assert update.count("\x1b[") >= 4
+
+    # nothing has changed: nothing is written
+    tui.print_board(game, only_changes=True)
+    assert tui.console.file.writes == 2
+
+
+def test_whole_board_is_redrawn_on_a_file():
+    game = Game([Player("a", "#5442f5"), Player("b", "#42f2f5")], 2, 8)
+    tui = make_tui(is_terminal=False)
+    tui.print_board(game)
+    tui.print_board(game, only_changes=True)
+    output = tui.console.file.getvalue()
+    assert output[:len(output) // 2] == output[len(output) // 2:]
+
+
+def test_player_move_is_looked_up_in_the_legal_moves():
+    players = [Player("a", "#5442f5"), Player("b", "#42f2f5")]
+    game = Game(players, 2, 6)
+    tui = make_tui()
+    # the piece on (1, 2), then the cell (2, 3), counted from 1
+    tui.get_int_input = Mock(side_effect=[2, 3, 3, 4])
+    legal_moves = LegalMoves(game, players[0])
+    move = tui.get_player_move(players[0], game, legal_moves)
+    assert move is legal_moves.get_moves((1, 2), (2, 3))[0]
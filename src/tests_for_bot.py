@@ -1,9 +1,9 @@
 import pytest
-from src.game import Game
-from src.player import Player
-from src.board import Board
-from src.game_piece import GamePiece
-from src.bot import CheckersBot, RandomBot
+from game import Game
+from player import Player
+from board import Board
+from game_piece import GamePiece
+from bot import CheckersBot, RandomBot
 
 
 def test_checkers_1():
@@ -83,4 +83,4 @@ def test_checkers_4():
     game.board.place_piece(piece_2)
     game.board.place_piece(piece_3)
     chosen = player_1.choose_move(test_board, game.get_possible_moves(player_1))
-    assert chosen == [piece_1, [(8, 4), (10, 2)]]
\ No newline at end of file
+    assert chosen == [piece_1, [(8, 4), (10, 2)]]
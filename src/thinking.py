@@ -0,0 +1,222 @@
+"""
+This is a file that contains the thinking of the bots in the background.
+
+A bot chooses its move in a thread of its own, on a copy of the game, so that
+a front-end keeps drawing the game and handling the events of the players
+while the bot thinks (BotThinker). A bot can also think about its replies
+while its opponent thinks about their move (Ponderer).
+
+The thread thinks with a copy of the bot (see copy_bot), so nothing the
+front-end uses is changed by it. The copy shares the transposition table of
+the bot, which is why the bot itself must not choose a move until the thread
+has ended: the thread is always joined when it is stopped.
+"""
+
+import copy
+import threading
+
+
+def copy_bot(bot, game):
+    """
+    Copies a bot, and the game for it to think in
+
+    Input:
+        bot (Player) - the bot, one of the players of the game
+        game (Game) - the game
+    Output:
+        tuple(Player, Game) - a shallow copy of the bot and a copy of the game
+        in which the copy of the bot plays in place of the bot
+    """
+    bot_copy = copy.copy(bot)
+    game_copy = game.copy({bot: bot_copy})
+    if hasattr(bot_copy, "game"):
+        bot_copy.game = game_copy
+    return bot_copy, game_copy
+
+
+class BotThinker:
+    """
+    This class chooses the move of a bot in a background thread.
+
+    A copy of the bot searches a copy of the game (see copy_bot), and the
+    move it chooses is translated back to the same move of the game itself.
+
+    Public attributes:
+    - bot: the bot that chooses the move.
+    """
+
+    def __init__(self, bot, game, legal_moves, on_done=None):
+        """
+        Starts the thread of the bot.
+
+        Input:
+            bot (Player) - the bot to move
+            game (Game) - the game, it is not changed by the bot
+            legal_moves (LegalMoves) - the legal moves of the bot in the game
+            on_done (function) - called without arguments in the thread of
+                                 the bot once the move has been chosen (for
+                                 example to wake up an event loop), or None
+        """
+        self.bot = bot
+        self._bot, self._game = copy_bot(bot, game)
+        self._legal_moves = legal_moves
+        self._on_done = on_done
+        self._move = None
+        self._error = None
+        self._done = threading.Event()
+        self._cancelled = False
+        self._thread = threading.Thread(target=self._think, daemon=True)
+        self._thread.start()
+
+    def _think(self):
+        bot = self._bot
+        try:
+            move = bot.choose_move(self._game.board, self._game.get_possible_moves(bot))
+            # The same move of the original game
+            origin = move[0].position
+            path = list(move[1])
+            for legal_move in self._legal_moves.get_moves(origin, path[-1]):
+                if list(legal_move.path) == path:
+                    self._move = legal_move
+                    break
+            else:
+                raise ValueError("The bot has chosen a move that is not legal")
+        except Exception as error:
+            self._error = error
+        finally:
+            self._done.set()
+        if self._on_done is not None and not self._cancelled:
+            self._on_done()
+
+    def is_done(self):
+        """
+        Checks if the bot has chosen its move
+        """
+        return self._done.is_set()
+
+    def get_move(self, timeout=None):
+        """
+        Returns the move the bot has chosen, waiting for it if needed.
+
+        Input:
+            timeout (float) - the number of seconds to wait at most (None for no limit)
+        Output:
+            Move - the move of the game, None if the bot is still thinking
+        :raises: the exception raised by the bot, if it has raised one
+        """
+        if not self._done.wait(timeout):
+            return None
+        if self._error is not None:
+            raise self._error
+        return self._move
+
+    def cancel(self):
+        """
+        Asks the bot to stop thinking and waits for its thread to end, after
+        which the bot can be used again. A bot that can be stopped (see
+        AlphaBetaBot.stop) returns its best move so far, and on_done is not
+        called any more.
+        """
+        self._cancelled = True
+        if hasattr(self._bot, "stop"):
+            self._bot.stop()
+        self._thread.join()
+
+
+class Ponderer:
+    """
+    This class lets a bot think about its replies during the turn of its
+    opponent, in a background thread.
+
+    Every legal move of the opponent is made on a copy of the game, one after
+    another, and the reply a copy of the bot (see copy_bot) chooses is kept by
+    the key of the position after the move. When the opponent plays one of
+    these moves, the reply is there right away (see get_reply). The replies
+    are only the ones of a single turn, so a new Ponderer is made every turn.
+
+    Public attributes:
+    - bot: the bot that thinks.
+    - replies: dict of the replies of the bot, as (position of the piece,
+               path of the move), by the key of the board they are for.
+    """
+
+    def __init__(self, bot, game, opponent):
+        """
+        Starts the thread of the bot.
+
+        Input:
+            bot (Player) - the bot that thinks
+            game (Game) - the game, in the turn of the opponent. It is not
+                          changed by the bot.
+            opponent (Player) - the player to move
+        """
+        self.bot = bot
+        self.replies = {}
+        self._bot, self._game = copy_bot(bot, game)
+        self._opponent = opponent
+        self._stopped = False
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._ponder, daemon=True)
+        self._thread.start()
+
+    def _ponder(self):
+        bot = self._bot
+        game = self._game
+        try:
+            for move in list(game.get_possible_moves(self._opponent)):
+                if self._stopped:
+                    break
+                game.make_move(move, undoable=True)
+                key = game.board.key
+                possible_moves = game.get_possible_moves(bot)
+                if key not in self.replies and possible_moves != []:
+                    reply = bot.choose_move(game.board, possible_moves)
+                    # A search that has been stopped is not finished
+                    if not self._stopped:
+                        self.replies[key] = (reply[0].position, list(reply[1]))
+                game.unmake_move()
+        finally:
+            self._done.set()
+
+    def is_done(self):
+        """
+        Checks if the bot has found its replies to all the moves of the opponent
+        """
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Waits for the bot to find all its replies, returns whether it has
+        """
+        return self._done.wait(timeout)
+
+    def stop(self):
+        """
+        Stops the thinking of the bot (see AlphaBetaBot.stop) and waits for
+        its thread to end, after which the bot can be used again. The replies
+        found so far are kept.
+        """
+        self._stopped = True
+        if hasattr(self._bot, "stop"):
+            self._bot.stop()
+        self._thread.join()
+
+    def get_reply(self, game, legal_moves):
+        """
+        Returns the reply the bot has found for the position of the game.
+
+        Input:
+            game (Game) - the game, in the turn of the bot
+            legal_moves (LegalMoves) - the legal moves of the bot in the game
+        Output:
+            Move - the reply, one of the legal moves, or None if the bot has
+                   not thought about the position
+        """
+        reply = self.replies.get(game.board.key)
+        if reply is None:
+            return None
+        origin, path = reply
+        for move in legal_moves.get_moves(origin, path[-1]):
+            if list(move.path) == path:
+                return move
+        return None
@@ -0,0 +1,282 @@
+"""
+This is a file that contains a runner of tournaments between the bots.
+
+Every game of a tournament is independent: it is played out (see
+Game.play_out) on a new Game, with the random numbers of the bots seeded by
+the seed of the tournament and the number of the game, so that any game can be
+replayed. The games are played by a pool of processes, one per core by default.
+"""
+
+from multiprocessing import Pool
+from time import perf_counter
+import random
+
+import click
+
+from game import Game
+from bot import CheckersBot, RandomBot, AlphaBetaBot
+from transposition_table import TranspositionTable
+from game_record import GameRecord, GameRecordWriter
+
+# The types of the bots that can play in a tournament
+BOT_TYPES = {
+    "random-bot": RandomBot,
+    "smart-bot": CheckersBot,
+    "search-bot": AlphaBetaBot,
+}
+
+
+class TournamentSettings:
+    """
+    This class stores the settings every game of a tournament is played with.
+
+    Public attributes:
+    - bot_types: (str, str) types of the two bots, see BOT_TYPES.
+    - rows_with_pieces: number of rows populated with the pieces of a player.
+    - width: width of the board.
+    - max_plies: number of moves after which a game is a draw.
+    - max_plies_without_capture: number of moves without a capture after
+                                 which a game is a draw.
+    - search_time: number of seconds the search-bot may think about a move.
+    - tt_size: entries in the transposition table of the search-bot (0 for none).
+    - seed: the seed of the tournament.
+    - record: whether the records of the games are kept (see GameResult).
+    """
+
+    def __init__(self, bot_types, rows_with_pieces=3, width=8, max_plies=400,
+                 search_time=0.1, tt_size=65536, seed=0, max_plies_without_capture=100,
+                 record=False):
+        self.bot_types = bot_types
+        self.rows_with_pieces = rows_with_pieces
+        self.width = width
+        self.max_plies = max_plies
+        self.max_plies_without_capture = max_plies_without_capture
+        self.search_time = search_time
+        self.tt_size = tt_size
+        self.seed = seed
+        self.record = record
+
+
+class GameResult:
+    """
+    This class stores the result of a game of a tournament.
+
+    Public attributes:
+    - number: the number of the game in the tournament.
+    - winner: 0 or 1 for the bot that has won, None for a draw.
+    - reason: why the game has ended (see PlayOutResult).
+    - plies: number of moves made in the game.
+    - move_times: ([float], [float]) seconds every move of either bot took.
+    - record: the GameRecord of the game, None unless the settings ask for it.
+    """
+
+    def __init__(self, number, winner, reason, plies, move_times, record=None):
+        self.number = number
+        self.winner = winner
+        self.reason = reason
+        self.plies = plies
+        self.move_times = move_times
+        self.record = record
+
+
+class TimedPlayer:
+    """
+    This class chooses the moves for a bot, keeping the time every choice took.
+
+    Public attributes:
+    - bot: the bot that chooses the moves.
+    - move_times: list of the seconds every move took.
+    """
+    __slots__ = ("bot", "move_times")
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.move_times = []
+
+    def choose_move(self, board, possible_moves):
+        start = perf_counter()
+        move = self.bot.choose_move(board, possible_moves)
+        self.move_times.append(perf_counter() - start)
+        return move
+
+
+def create_bot(bot_type, name, color, settings):
+    """
+    Creates a bot of the given type
+
+    Input:
+        bot_type (str) - type of the bot, see BOT_TYPES
+        name (str) - name of the bot
+        color (str) - color of the pieces of the bot
+        settings (TournamentSettings) - the settings of the tournament
+    Output:
+        Player - the bot
+    """
+    if bot_type == "search-bot":
+        table = TranspositionTable(settings.tt_size) if settings.tt_size > 0 else None
+        return AlphaBetaBot(name, color, time_limit=settings.search_time,
+                            transposition_table=table)
+    return BOT_TYPES[bot_type](name, color)
+
+
+def play_game(task):
+    """
+    Plays a single game of a tournament. The bots swap their seats every
+    game, so that both of them start the same number of games.
+
+    Input:
+        task (tuple(int, TournamentSettings)) - the number of the game and
+                                                the settings of the tournament
+    Output:
+        GameResult - the result of the game
+    """
+    number, settings = task
+    random.seed(f"{settings.seed}:{number}")
+    bots = [create_bot(bot_type, f"{bot_type}-{i + 1}", color, settings)
+            for i, (bot_type, color) in enumerate(zip(settings.bot_types, ("white", "black")))]
+    players = bots if number % 2 == 0 else bots[::-1]
+    game = Game(players, settings.rows_with_pieces, settings.width)
+    for bot in bots:
+        if type(bot) is AlphaBetaBot:
+            bot.game = game
+
+    record = GameRecord.from_game(game) if settings.record else None
+    timed_players = [TimedPlayer(player) for player in players]
+    result = game.play_out(timed_players, settings.max_plies,
+                           settings.max_plies_without_capture,
+                           on_move=record.add_move if record is not None else None)
+    if record is not None:
+        record.set_result(result, players)
+
+    winner = None if result.winner is None else bots.index(result.winner)
+    move_times = tuple(timed_players[players.index(bot)].move_times for bot in bots)
+    return GameResult(number, winner, result.reason, result.plies, move_times, record)
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which the given fraction of the sorted values lie
+    """
+    if values == []:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_tournament(settings, number_of_games, processes=None, writer=None):
+    """
+    Plays the games of a tournament on a pool of processes and collects
+    their results.
+
+    Input:
+        settings (TournamentSettings) - the settings of the tournament
+        number_of_games (int) - number of games to play
+        processes (int) - number of processes, None for one per core
+        writer (GameRecordWriter) - writer of the records of the games, in
+                                    the order they finish (settings.record
+                                    has to be set), or None
+    Output:
+        dict - the wins of either bot, the draws (also by their reason), the
+               average game length and the median, 99th percentile and
+               maximum move times of the bots
+    """
+    wins = [0, 0]
+    draws = 0
+    draw_reasons = {}
+    total_plies = 0
+    move_times = ([], [])
+    tasks = ((number, settings) for number in range(number_of_games))
+    with Pool(processes) as pool:
+        for result in pool.imap_unordered(play_game, tasks, chunksize=4):
+            if result.winner is None:
+                draws += 1
+                draw_reasons[result.reason] = draw_reasons.get(result.reason, 0) + 1
+            else:
+                wins[result.winner] += 1
+            total_plies += result.plies
+            if writer is not None:
+                writer.write_record(result.record)
+            for times, new_times in zip(move_times, result.move_times):
+                times += new_times
+
+    summary = {
+        "games": number_of_games,
+        "wins": wins,
+        "draws": draws,
+        "draw_reasons": draw_reasons,
+        "average_plies": total_plies / number_of_games if number_of_games else 0.0,
+        "move_times": [],
+    }
+    for times in move_times:
+        times.sort()
+        summary["move_times"].append({
+            "median": percentile(times, 0.5),
+            "p99": percentile(times, 0.99),
+            "max": times[-1] if times else 0.0,
+        })
+    return summary
+
+
+@click.command(name="checkers-tournament")
+@click.option('--bot-1', type=click.Choice(list(BOT_TYPES)), default="smart-bot")
+@click.option('--bot-2', type=click.Choice(list(BOT_TYPES)), default="random-bot")
+@click.option('--games', default=100, type=click.IntRange(min=1))
+@click.option('--processes', default=None, type=click.IntRange(min=1),
+              help="Number of processes playing the games (default is one per core)")
+@click.option('--seed', default=0)
+@click.option('--width', default=8)
+@click.option('--rows-with-pieces', default=3)
+@click.option('--max-plies', default=400, type=click.IntRange(min=1),
+              help="Number of moves after which a game is a draw")
+@click.option('--max-plies-without-capture', default=100, type=click.IntRange(min=1),
+              help="Number of moves without a capture after which a game is a draw")
+@click.option('--search-time', default=100,
+              help="Milliseconds the search-bot may think about a move")
+@click.option('--tt-size', default=65536, type=click.IntRange(min=0),
+              help="Entries in the transposition table of the search-bot (0 to disable)")
+@click.option('--record', 'record_path', default=None,
+              type=click.Path(dir_okay=False, writable=True),
+              help="File of game records to append the games to")
+def cmd(bot_1, bot_2, games, processes, seed, width, rows_with_pieces, max_plies,
+        max_plies_without_capture, search_time, tt_size, record_path):
+    """
+    This is the command line interface for the tournaments between the bots.
+
+    Input:
+        bot_1 (str) - type of the first bot
+        bot_2 (str) - type of the second bot
+        games (int) - number of games to play
+        processes (int) - number of processes playing the games
+        seed (int) - seed of the tournament
+        width (int) - width of the board
+        rows_with_pieces (int) - number of rows with pieces
+        max_plies (int) - number of moves after which a game is a draw
+        max_plies_without_capture (int) - number of moves without a capture after
+                                          which a game is a draw
+        search_time (int) - milliseconds the search-bot may think about a move
+        tt_size (int) - number of entries in the transposition table of the search-bot
+        record_path (str) - file of game records to append the games to (None to not record them)
+    """
+    if tt_size == 1:
+        raise click.BadParameter("the table needs at least 2 entries (or 0 to disable it)",
+                                 param_hint="--tt-size")
+    settings = TournamentSettings((bot_1, bot_2), rows_with_pieces, width, max_plies,
+                                  search_time / 1000, tt_size, seed, max_plies_without_capture,
+                                  record=record_path is not None)
+    if record_path is not None:
+        with open(record_path, "ab") as file:
+            summary = run_tournament(settings, games, processes, GameRecordWriter(file))
+    else:
+        summary = run_tournament(settings, games, processes)
+
+    click.echo(f"{summary['games']} games, average length {summary['average_plies']:.1f} moves")
+    click.echo(f"{bot_1} (bot 1) won {summary['wins'][0]}, "
+               f"{bot_2} (bot 2) won {summary['wins'][1]}, draws {summary['draws']}")
+    for reason, count in sorted(summary["draw_reasons"].items()):
+        click.echo(f"  draws by {reason}: {count}")
+    for name, times in zip((bot_1, bot_2), summary["move_times"]):
+        click.echo(f"{name} move time: median {times['median'] * 1000:.2f} ms, "
+                   f"p99 {times['p99'] * 1000:.2f} ms, max {times['max'] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    cmd()
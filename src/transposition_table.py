@@ -0,0 +1,162 @@
+"""
+Transposition table for the search bots.
+
+The table keeps the results of searched positions, keyed by the Zobrist key
+of the position (Board.key), so that a position reached again through a
+different order of moves does not have to be searched again.
+"""
+
+# Types of the score stored in an entry
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable:
+    """
+    A transposition table of a fixed size. The table is split into buckets
+    of two entries: the first entry of a bucket is only replaced by results of
+    searches at least as deep (depth-preferred), the second entry is always
+    replaced. This way the memory used by the table never grows, however long
+    the bot plays, while the most valuable results are kept.
+
+    Entries are aged: the bot calls new_search before every move, and a
+    depth-preferred entry stored during an earlier search is replaced like
+    any other, so deep results of positions that are long gone from the game
+    do not hold on to their entries for the whole session.
+
+    Every entry is a tuple (key, depth, bound, score, best_move), where bound
+    is one of EXACT, LOWER_BOUND and UPPER_BOUND, and best_move is whatever the
+    search stored as the move to try first (or None).
+
+    Public attributes:
+    - size: the number of entries the table can hold.
+    - hits: number of probes that found the position.
+    - misses: number of probes that did not find the position.
+    - collisions: number of misses where the bucket was taken by other positions.
+    - stores: number of results stored.
+    - overwrites: number of stores that replaced the entry of another position.
+    - generation: number of the current search, see new_search.
+    """
+
+    def __init__(self, size=65536):
+        """
+        Creates an empty table.
+
+        Input:
+            size: int - the maximal number of entries. It is rounded down to a
+                  power of two, and has to be at least 2.
+        """
+        if size < 2:
+            raise ValueError("The transposition table needs at least 2 entries")
+        number_of_buckets = 1 << ((size // 2).bit_length() - 1)
+        self.size = 2 * number_of_buckets
+        self._mask = number_of_buckets - 1
+        self._entries = [None] * self.size
+        # Generation of the search every depth-preferred entry was stored in
+        self._generations = [0] * number_of_buckets
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """
+        Starts a new generation of entries. The entries stored before are
+        still found, but no longer protected from being replaced.
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """
+        Looks up the entry of a position.
+
+        Input:
+            key: int - the Zobrist key of the position
+
+        Output:
+            tuple(int, int, int, int, any) - the entry (key, depth, bound,
+            score, best_move), or None if the position is not in the table
+        """
+        index = (key & self._mask) << 1
+        entries = self._entries
+        for entry in (entries[index], entries[index + 1]):
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry
+        self.misses += 1
+        if entries[index] is not None or entries[index + 1] is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, bound, score, best_move):
+        """
+        Stores the result of a search of a position.
+
+        Input:
+            key: int - the Zobrist key of the position
+
+            depth: int - the depth the position was searched to
+
+            bound: int - EXACT, LOWER_BOUND or UPPER_BOUND
+
+            score: int - the score of the position
+
+            best_move: the move to try first when the position is searched again
+        """
+        index = (key & self._mask) << 1
+        entries = self._entries
+        entry = (key, depth, bound, score, best_move)
+        self.stores += 1
+
+        bucket = index >> 1
+        deep_entry = entries[index]
+        if (deep_entry is None or deep_entry[0] == key or depth >= deep_entry[1] or
+                self._generations[bucket] != self.generation):
+            if deep_entry is not None and deep_entry[0] != key:
+                self.overwrites += 1
+                # the replaced result still gets a place in the other entry
+                entries[index + 1] = deep_entry
+            elif entries[index + 1] is not None and entries[index + 1][0] == key:
+                entries[index + 1] = None
+            entries[index] = entry
+            self._generations[bucket] = self.generation
+        else:
+            if entries[index + 1] is not None and entries[index + 1][0] != key:
+                self.overwrites += 1
+            entries[index + 1] = entry
+
+    def clear(self):
+        """
+        Removes all the entries and resets the counters.
+        """
+        self._entries = [None] * self.size
+        self._generations = [0] * (self.size // 2)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def get_stats(self):
+        """
+        Returns the counters of the table, for tuning its size.
+
+        Output:
+            dict - hits, misses, collisions, stores, overwrites, the hit rate
+                   and the number of entries in use
+        """
+        probes = self.hits + self.misses
+        return {
+            "size": self.size,
+            "used": sum(1 for entry in self._entries if entry is not None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }
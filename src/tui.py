@@ -5,15 +5,26 @@ Aleksnadr Timokhin
 """
 
 from rich.console import Console
+from rich.control import Control
+from rich.style import Style
+from rich.text import Text
 import click
 
 from game import Game
 from player import Player
 from board import Board
-from bot import CheckersBot, RandomBot
+from bot import CheckersBot, RandomBot, AlphaBetaBot
+from transposition_table import TranspositionTable
+from instrumentation import Profiler, default_targets
+from legal_moves import LegalMoves
+from thinking import Ponderer
 
 import math
 
+# Colours of the cells of the board, and of the highlighted cells
+BOARD_COLOURS = ["#eddad3", "#4a2112"]
+HIGHLIGHT_COLOUR = "blue"
+
 class TUI:
     """
     This class is used to call methods for interacting with user via a console 
@@ -22,10 +33,34 @@ class TUI:
     """
     def __init__(self):
         self.console = Console()
-    
-    def print_board(self, game, highlights=[]):
+        # The Styles of the cells of the game they were made for, and the
+        # cells of the last board printed (see print_board)
+        self._styles_game = None
+        self._styles = None
+        self._frame = None
+
+    def _get_styles(self, game):
+        """
+        Returns the Styles of the cells, by (background, seat of the player
+        whose piece is on the cell or None). The backgrounds are the two
+        colours of the board (0, 1) and the highlight (2).
+        They are made once per game.
+        """
+        if self._styles_game is not game:
+            backgrounds = [Style(bgcolor=colour) for colour in BOARD_COLOURS]
+            backgrounds.append(Style(bgcolor=HIGHLIGHT_COLOUR))
+            self._styles = {}
+            for background_index, background in enumerate(backgrounds):
+                self._styles[(background_index, None)] = background
+                for seat, player in enumerate(game.players):
+                    self._styles[(background_index, seat)] = background + Style(color=player.color)
+            self._styles_game = game
+        return self._styles
+
+    def print_board(self, game, highlights=[], only_changes=False):
         """
         This function prints the board to the console.
+        The whole board is written to the console at once.
 
         Input:
             game: (Game) The game that is being played
@@ -33,49 +68,80 @@ class TUI:
             highlights: (list) A list of (row_number, col_number) tuples to
                          highlight on the board
 
+            only_changes: (bool) Whether to redraw only the cells that have
+                          changed since the last board was printed, by moving
+                          the cursor back over it. It is only right if nothing
+                          else has been printed since; the whole board is
+                          printed anyway if the console is not a terminal or
+                          the last board was of another size.
         """
         board = game.board
-        player_colours = list(player.color for player in game.players) 
-        board_colours = ["#eddad3", "#4a2112"]  # Colours of the game board pieces
-        highlight_colour = "on blue"
+        styles = self._get_styles(game)
+        players = game.players
+        highlights = set(highlights)
 
         spaces_at_front = math.floor(math.log10(board.number_of_cols))
+        padding = " " * spaces_at_front
+        cells = []
+        for index, piece in enumerate(board.cells):
+            row_number, col_number = divmod(index, board.number_of_cols)
+            background = 2 if (row_number, col_number) in highlights else (row_number + col_number) % 2
+            if piece is None:
+                cells.append((background, None, " "))
+            else:
+                cells.append((background, players.index(piece.player), "K" if piece.is_king else "O"))
+
+        def append_cell(text, cell):
+            background, seat, character = cell
+            if seat is None:
+                text.append(padding + character, styles[(background, None)])
+            else:
+                text.append(padding, styles[(background, None)])
+                text.append(character, styles[(background, seat)])
+
+        row_prefixes = [(" " * (spaces_at_front - math.floor(math.log10(row_number + 1))))
+                        + f"{row_number + 1}|" for row_number in range(board.number_of_rows)]
+        size = (board.number_of_rows, board.number_of_cols)
+
+        if (only_changes and self._frame is not None and self._frame[0] == size
+                and self.console.is_terminal):
+            # The cursor is on the line below the last board: the row of a
+            # cell is 2 * (number_of_rows - row_number) lines above it
+            renderables = []
+            for index, (cell, last_cell) in enumerate(zip(cells, self._frame[1])):
+                if cell == last_cell:
+                    continue
+                row_number, col_number = divmod(index, board.number_of_cols)
+                lines_up = 2 * (board.number_of_rows - row_number)
+                column = len(row_prefixes[row_number]) + col_number * (spaces_at_front + 2)
+                text = Text()
+                append_cell(text, cell)
+                renderables += [Control.move_to_column(column, -lines_up), text,
+                                Control.move_to_column(0, lines_up)]
+            if renderables:
+                self.console.print(*renderables, sep="", end="")
+            self._frame = (size, cells)
+            return
 
         # separator_line = " "+f"+-" * board.number_of_cols + "+"
-        top_line = (" " * spaces_at_front) + " " # This space is for the top line of the board
+        top_line = padding + " " # This space is for the top line of the board
         for i in range(1, board.number_of_cols+1):
             top_line += (" " * (spaces_at_front -
                                    math.floor(math.log10(i)))) + f" {i}"
 
-        separator_line = (" " * spaces_at_front) + " " + ("+" + "-" *
+        separator_line = padding + " " + ("+" + "-" *
                             (spaces_at_front + 1)) *board.number_of_cols + "+"
-        self.console.print(top_line)
-        self.console.print(separator_line)
-        row_number = 0
-        for row in board.grid:
-            line_to_print = (" " * (spaces_at_front - math.floor(
-                math.log10(row_number + 1)))) + f"{row_number + 1}|"
-            col_number = 0
-            for col in row:
-                bg_colour = "on " + board_colours[(row_number + col_number) % 2]
-                if (row_number, col_number) in highlights:
-                    bg_colour = highlight_colour
-                char_to_print = " "
-                if col is not None:
-                    player_index = game.players.index(col.player)
-                    if col.is_king:
-                        char_to_print = "K"
-                    else:
-                        char_to_print = "O"
-                    # Adding color to the symbol
-                    char_to_print = f"[{player_colours[player_index]}]{char_to_print}[/{player_colours[player_index]}]"
-                line_to_print += f"[{bg_colour}]"+f" " * ((spaces_at_front)) +f"{char_to_print}[/{bg_colour}]|"
-                col_number += 1
-            # 1. Print the row content
-            self.console.print(line_to_print)
-            # 2. Print the separator line
-            self.console.print(separator_line)
-            row_number += 1
+
+        text = Text(top_line + "\n" + separator_line + "\n")
+        for row_number, row_prefix in enumerate(row_prefixes):
+            text.append(row_prefix)
+            for cell in cells[row_number * board.number_of_cols:
+                              (row_number + 1) * board.number_of_cols]:
+                append_cell(text, cell)
+                text.append("|")
+            text.append("\n" + separator_line + "\n")
+        self.console.print(text, end="")
+        self._frame = (size, cells)
 
     def get_int_input(self, prompt, range=(-1, -1)):
         """
@@ -188,7 +254,7 @@ class TUI:
                 self.console.print("Invalid position")
         return (row, col)
 
-    def get_player_move(self,player,game):
+    def get_player_move(self, player, game, legal_moves=None):
         """
         This method will ask user to select a piece to move.
 
@@ -196,58 +262,35 @@ class TUI:
             player (Player) - player that has to choose a piece to move
 
             game (Game) - the game that the player has to choose a piece to move
+
+            legal_moves (LegalMoves) - the legal moves of the player in this
+                                       turn, found from the game by default
         Output:
-            [GamePiece,list[tuple(int,int)]] - the piece that the user chose to move and the move they selected.
+            Move - the piece that the user chose to move and the move they selected.
         """
+        if legal_moves is None:
+            legal_moves = LegalMoves(game, player)
 
-        possible_jumps = game.get_all_jumps(player)
-       
-        if possible_jumps == []:
-            possible_moves = game.get_possible_moves(player)
-            pieces_that_can_be_moved = []
-            for move in possible_moves:
-                pieces_that_can_be_moved.append(move[0])
-            pieces_that_can_be_moved = list(set(pieces_that_can_be_moved)) # Remove duplicates
-
-            pieces_that_can_be_moved_pos = list(piece.position for piece in pieces_that_can_be_moved)
-            # Print the board with pieces that can be moved
-            self.console.print(f"[on green]{player.name}[/on green] can move this pieces:")
-            self.print_board(game, highlights=pieces_that_can_be_moved_pos)
+        pieces_that_can_be_moved_pos = legal_moves.get_origins()
+        # Print the board with pieces that can be moved
+        self.console.print(f"[on green]{player.name}[/on green] can move this pieces:")
+        self.print_board(game, highlights=pieces_that_can_be_moved_pos)
 
-            # Force user to chose valid game_piece position
-            valid_piece_pos = self.get_valid_pos(pieces_that_can_be_moved_pos)
-            piece_to_move = game.board.grid[valid_piece_pos[0]][valid_piece_pos[1]]
+        # Force user to chose valid game_piece position
+        valid_piece_pos = self.get_valid_pos(pieces_that_can_be_moved_pos)
 
+        if not legal_moves.is_jump:
             # Print possible moves for that piece
-            possible_piece_moves = game.get_possible_moves_for_piece(piece_to_move)
-            arriving_positions = []
-            for move in possible_piece_moves:
-                arriving_positions.append(move[1][-1])
+            arriving_positions = legal_moves.get_destinations(valid_piece_pos)
             self.console.print(f"[on green]{player.name}[/on green] This is where you can move your piece to:")
             self.print_board(game, highlights=arriving_positions)
 
             # Force user to chose valid game_piece position
             valid_final_piece_pos = self.get_valid_pos(arriving_positions, prompt="Choose where to move the piece to")
-            move_selected = []
-            for move in possible_piece_moves:
-                if move[1][-1] == valid_final_piece_pos:
-                    move_selected = move
-            return move_selected
+            return legal_moves.get_moves(valid_piece_pos, valid_final_piece_pos)[0]
         else:
-            pieces_that_can_be_moved = []
-            for move in possible_jumps:
-                pieces_that_can_be_moved.append(move[0])
-            pieces_that_can_be_moved = list(set(pieces_that_can_be_moved)) # Remove duplicates
-
-            pieces_that_can_be_moved_pos = list(piece.position for piece in pieces_that_can_be_moved)
-            # Print the board with pieces that can be moved
-            self.console.print(f"[on green]{player.name}[/on green] can move this pieces:")
-            self.print_board(game, highlights=pieces_that_can_be_moved_pos)
-            # Force user to chose valid game_piece position
-            valid_piece_pos = self.get_valid_pos(pieces_that_can_be_moved_pos)
-            piece_to_move = game.board.grid[valid_piece_pos[0]][valid_piece_pos[1]]
             # Print possible moves for that piece
-            possible_piece_moves = game.get_possible_jumps_for_piece(piece_to_move)
+            possible_piece_moves = legal_moves.get_moves_from(valid_piece_pos)
             moves_paths = list(move[1] for move in possible_piece_moves)
 
             self.console.print(f"There are {len(possible_piece_moves)} possible jumps for this piece:")
@@ -278,7 +321,7 @@ def is_bot(player) -> bool:
         True - if the player is of class that inherits Player
         False - if the player is of class Player and not its children.
     """
-    return type(player) is RandomBot or type(player) is CheckersBot
+    return type(player) in (RandomBot, CheckersBot, AlphaBetaBot)
    
 
 class TUIGame:
@@ -288,11 +331,17 @@ class TUIGame:
     Public Attributes:
         - game (Game) - the game that the player has to play.
         - tui (TUI) - a class that allows to interact with the user interface.
+        - redraw_changes (bool) - whether to redraw only the changed cells of
+                                  the board after the move of a bot.
+        - ponder (bool) - whether the bots think about their replies while
+                          a human player thinks about their move (see Ponderer).
     """
 
-    def __init__(self, game):
+    def __init__(self, game, redraw_changes=False, ponder=False):
         self.game = game
         self.tui = TUI()
+        self.redraw_changes = redraw_changes
+        self.ponder = ponder
 
     def play_game(self):
         """
@@ -311,10 +360,21 @@ class TUIGame:
         should_offer_draw = not(is_bot(current_player) or is_bot(next_player))
 
 
+        # Whether the last board printed is the last thing on the screen,
+        # which is the case after the move of a bot
+        board_on_screen = False
+
+        # The legal moves of the player to move, found once per turn
+        legal_moves = LegalMoves(self.game, current_player)
+
+        # The bot thinking during the turn of a human player, if any
+        ponderer = None
+
         # Game loop
-        while not (self.check_player_lost(current_player) or is_draw):
+        while not (self.check_player_lost(current_player, legal_moves) or is_draw):
              # Printing board
-            self.tui.print_board(self.game)
+            self.tui.print_board(self.game,
+                                 only_changes=self.redraw_changes and board_on_screen)
             
             # A turns starts with asking if users want to declare a draw
             if should_offer_draw:
@@ -327,9 +387,22 @@ class TUIGame:
              
             # Asking for players move.
             if is_bot(current_player):
-                move = current_player.choose_move(self.game.board, self.game.get_possible_moves(current_player))
+                move = None
+                if ponderer is not None:
+                    move = ponderer.get_reply(self.game, legal_moves)
+                    ponderer = None
+                if move is None:
+                    move = current_player.choose_move(self.game.board, legal_moves.moves)
+                board_on_screen = True
             else:
-                move = self.tui.get_player_move(current_player, self.game)
+                if self.ponder and is_bot(next_player):
+                    ponderer = Ponderer(next_player, self.game, current_player)
+                try:
+                    move = self.tui.get_player_move(current_player, self.game, legal_moves)
+                finally:
+                    if ponderer is not None:
+                        ponderer.stop()
+                board_on_screen = False
 
             # Performing the move
             self.game.make_move(move)
@@ -338,23 +411,27 @@ class TUIGame:
             turn += 1
             current_player = self.game.players[turn % player_count]
             next_player = self.game.players[(turn + 1) % player_count]
+            legal_moves = LegalMoves(self.game, current_player)
 
         # When the game is over, a description of how the game ended should 
         # be provided
         winner = None if is_draw else self.game.players[(turn + 1) % player_count]
         self.tui.print_winner_screen(winner)         
 
-    def check_player_lost(self, current_player):
+    def check_player_lost(self, current_player, legal_moves=None):
         """
         Checks if the player lost the game or not
         Input:
             current_player (Player) - a player whose turn it is
+            legal_moves (LegalMoves) - the legal moves of the player in this
+                                       turn, if they have been found already
         Output:
             True - if the player has lost the game
             False - if the player has not lost the game
         """
-        valid_moves = self.game.get_possible_moves(current_player)
-        return valid_moves == []
+        if legal_moves is not None:
+            return len(legal_moves) == 0
+        return not self.game.has_any_move(current_player)
 
     def is_draw(self, current_player, next_player):
         """
@@ -380,11 +457,22 @@ class TUIGame:
         return False
 
 @click.command(name="checkers-tui")
-@click.option('--player-1-type', default="Player One")
-@click.option('--player-2-type', default="Player Two")
+@click.option('--player-1', '--player-1-type', 'player_1_type', default="Player One")
+@click.option('--player-2', '--player-2-type', 'player_2_type', default="Player Two")
 @click.option('--width', default=8)
 @click.option('--rows-with-pieces', default=2)
-def cmd(player_1_type, player_2_type, width, rows_with_pieces):
+@click.option('--search-time', default=100,
+              help="Milliseconds the search-bot may think about a move")
+@click.option('--tt-size', default=65536, type=click.IntRange(min=0),
+              help="Entries in the transposition table of the search-bot (0 to disable)")
+@click.option('--profile', default=None, type=click.Path(dir_okay=False, writable=True),
+              help="File to write the calls and times of the hot paths to, as JSON")
+@click.option('--redraw-changes', is_flag=True,
+              help="After the move of a bot, redraw only the cells that have changed")
+@click.option('--ponder', is_flag=True,
+              help="Let the bots think about their replies while a human player thinks")
+def cmd(player_1_type, player_2_type, width, rows_with_pieces, search_time, tt_size, profile,
+        redraw_changes, ponder):
     """
     This is the command line interface for the Checkers TUI.
 
@@ -393,11 +481,21 @@ def cmd(player_1_type, player_2_type, width, rows_with_pieces):
         player_2_type (str) - type of player 2
         width (int) - width of the board
         rows_with_pieces (int) - number of rows with pieces
+        search_time (int) - milliseconds the search-bot may think about a move
+        tt_size (int) - number of entries in the transposition table of the search-bot
+        profile (str) - file to write the profile of the game to (None to not profile it)
+        redraw_changes (bool) - whether to redraw only the changed cells after the move of a bot
+        ponder (bool) - whether the bots think about their replies while a human player thinks
     """
+    if tt_size == 1:
+        raise click.BadParameter("the table needs at least 2 entries (or 0 to disable it)",
+                                 param_hint="--tt-size")
     if player_1_type == "random-bot":
         player_1 = RandomBot("random-bot-1","#5442f5")
     elif player_1_type == "smart-bot":
         player_1 = CheckersBot("smart-bot-1","#5442f5")
+    elif player_1_type == "search-bot":
+        player_1 = AlphaBetaBot("search-bot-1","#5442f5", time_limit=search_time / 1000)
     else:
         player_1 = Player(player_1_type, "#5442f5")
 
@@ -405,15 +503,31 @@ def cmd(player_1_type, player_2_type, width, rows_with_pieces):
         player_2 = RandomBot("random-bot-2","#42f2f5")
     elif player_2_type == "smart-bot":
         player_2 = CheckersBot("smart-bot-2","#42f2f5")
+    elif player_2_type == "search-bot":
+        player_2 = AlphaBetaBot("search-bot-2","#42f2f5", time_limit=search_time / 1000)
     else:
         player_2 = Player(player_2_type, "#42f2f5")
     
     players = [player_1, player_2]
     game = Game(players, rows_with_pieces, width)
-
-    tui_game = TUIGame(game)
-
-    tui_game.play_game()
+    for player in players:
+        if type(player) is AlphaBetaBot:
+            player.game = game
+            if tt_size > 0:
+                player.transposition_table = TranspositionTable(tt_size)
+
+    tui_game = TUIGame(game, redraw_changes, ponder)
+
+    profiler = None
+    if profile is not None:
+        profiler = Profiler()
+        profiler.enable(default_targets() + [(TUI, "print_board")])
+    try:
+        tui_game.play_game()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump(profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+"""
+Random tables for the Zobrist hashing of the positions of the game.
+
+A position is identified by XOR-ing together one random 64-bit key for every
+piece on the board (chosen by the owner, the kind of the piece and its cell)
+and one more key when the second player is to move. As XOR is its own
+inverse, the key can be updated in O(1) whenever a single piece changes.
+"""
+
+import random
+
+# Tables that have already been generated, by (number_of_rows, number_of_cols)
+_tables = {}
+
+
+class ZobristTable:
+    """
+    This class stores the random keys used to hash positions on a board of
+    a certain size. The keys are generated from a seed derived from the size
+    of the board, so they are the same in every process.
+
+    Public attributes:
+    - number_of_cells: number of cells of the board.
+    - side_key: the key XOR-ed in when the second player is to move.
+    """
+
+    def __init__(self, number_of_rows, number_of_cols):
+        self.number_of_cells = number_of_rows * number_of_cols
+        self._random = random.Random(f"zobrist-{number_of_rows}x{number_of_cols}")
+        self.side_key = self._random.getrandbits(64)
+        self._piece_keys = []
+
+    def get_piece_keys(self, slot):
+        """
+        Returns the keys for the pieces of a player.
+
+        Input:
+            slot: int - the number of the player on the board (0, 1, ...)
+
+        Output:
+            tuple(list[int], list[int]) - keys of the men and keys of the
+            kings of the player, indexed by the bit number of the cell
+        """
+        while len(self._piece_keys) <= slot:
+            men_keys = [self._random.getrandbits(64)
+                        for _ in range(self.number_of_cells)]
+            king_keys = [self._random.getrandbits(64)
+                         for _ in range(self.number_of_cells)]
+            self._piece_keys.append((men_keys, king_keys))
+        return self._piece_keys[slot]
+
+
+def get_zobrist_table(number_of_rows, number_of_cols):
+    """
+    Returns the table of Zobrist keys for a board of the given size.
+    The table is created on the first call and shared afterwards.
+    """
+    size = (number_of_rows, number_of_cols)
+    if size not in _tables:
+        _tables[size] = ZobristTable(number_of_rows, number_of_cols)
+    return _tables[size]